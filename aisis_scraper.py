@@ -1,54 +1,350 @@
 import os
+import codecs
 import requests
-import pickle
 import json
+import filecmp
+import itertools
 from bs4 import BeautifulSoup
 import re
 import time
 import uuid
 import sys
-import traceback
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import course_columnar
+import course_deltas
+import course_history
+import course_indexes
+import course_search
+import program_offerings
+import room_index
+import scrape_checkpoints
+import scrape_metrics
+import timeslots
+import response_cache
+from response_cache import ResponseCache
+from course_text import clean_text
+
+log = logging.getLogger(scrape_metrics.LOGGER_NAME)
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # lxml is optional, html.parser is always available
+    lxml = None
+
+DEPT_CODES = [
+    "**IE**", 
+    "BIO", "CH", "CHN", "COM", "CEPP", "CPA", "ELM", "DS", 
+    "EC", "ECE", "EN", "ES", "EU", "FIL", "FAA", "FA", "HSP", 
+    "HI", "SOHUM", "DISCS", "SALT", "INTAC", "IS", "JSP", "KSP", 
+    "LAS", "MAL", "MA", "ML", "NSTP (ADAST)", "NSTP (OSCI)", 
+    "PH", "PE", "PS", "POS", "PSY", "QMIT", "SB", "SOCSCI", 
+    "SA", "TH", "TMP"
+]
+
+
+class RateLimiter:
+    """Token bucket shared by every fetch worker so the whole run stays polite to AISIS."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request token is available. A rate of 0 or less disables limiting."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Bump whenever course_from_cells changes its output so cached rows are re-parsed.
+ROW_FORMAT_VERSION = 4
+
+# Fixed namespace so a section keeps the same id across scrapes.
+COURSE_ID_NAMESPACE = uuid.UUID('6f1d3b52-8a4e-4c0b-9d6e-2b7f0c9a5e31')
+
+_TIME_NOISE_RE = re.compile(r'\(FULLY ONSITE\)|\(FULLY ONLINE\)|~|\(\)$')
+_TEXT02_XPATH = "//td[contains(concat(' ', normalize-space(@class), ' '), ' text02 ')]"
+
+
+def course_id(applicable_period, dept_code, cat_no, section, occurrence=0):
+    """Stable id derived from (period, deptCode, catNo, section); repeats of a key get an occurrence suffix."""
+    name = f"{applicable_period}|{dept_code}|{cat_no}|{section}"
+    if occurrence:
+        name += f"|{occurrence}"
+    return str(uuid.uuid5(COURSE_ID_NAMESPACE, name))
+
+
+def course_from_cells(cells, dept_code, applicable_period=None):
+    """Build a course dict from the raw text of one 14-cell result row."""
+    cat_no = clean_text(cells[0])
+    section = clean_text(cells[1])
+    time_text = _TIME_NOISE_RE.sub('', clean_text(cells[4])).strip()
+    course = {
+        'id': course_id(applicable_period, dept_code, cat_no, section),
+        'deptCode': dept_code,
+        'catNo': cat_no,
+        'section': section,
+        'courseTitle': clean_text(cells[2]),
+        'units': clean_text(cells[3]),
+        'time': time_text,
+        'room': "TBA" if "TBA" in cells[5] else clean_text(cells[5]),
+        'instructor': clean_text(cells[6]),
+        'remarks': clean_text(cells[11])
+    }
+    course.update(timeslots.time_fields(time_text))
+    return course
+
+
+def cells_html_parser(html_content):
+    """Return the raw text of every text02 cell using BeautifulSoup's html.parser."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    return [cell.text for cell in soup.find_all('td', class_='text02')]
+
+
+def cells_lxml(html_content):
+    """Return the raw text of every text02 cell using lxml's C parser."""
+    if not html_content.strip():
+        return []
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    root = lxml.html.fromstring(html_content.encode('utf-8'), parser=parser)
+    return [''.join(cell.itertext()) for cell in root.xpath(_TEXT02_XPATH)]
+
+
+PARSER_BACKENDS = {'html.parser': cells_html_parser}
+if lxml is not None:
+    PARSER_BACKENDS['lxml'] = cells_lxml
+DEFAULT_PARSER = 'lxml' if lxml is not None else 'html.parser'
+
+
+class BufferedCells:
+    """Cell stream for backends that need the whole page: buffers the chunks and parses on close()."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.chunks = []
+
+    def feed(self, text):
+        self.chunks.append(text)
+
+    def close(self):
+        html_content = ''.join(self.chunks)
+        self.chunks = []
+        return self.backend(html_content)
+
+
+class LxmlCells:
+    """Incremental text02 cell extractor on lxml's HTMLPullParser.
+
+    Finished table rows are dropped from the tree as soon as their cells are
+    read, so memory is bounded by one row rather than the whole page. Gives
+    the same cells, in the same order, as cells_lxml.
+    """
+
+    def __init__(self):
+        self.parser = lxml.etree.HTMLPullParser(events=('start', 'end'))
+        self.cells = []
+        self.open_cells = []
+        self.fed = False
+
+    def _drain(self):
+        for event, element in self.parser.read_events():
+            tag = element.tag
+            if tag == 'td' and 'text02' in (element.get('class') or '').split():
+                if event == 'start':
+                    self.open_cells.append(len(self.cells))
+                    self.cells.append(None)
+                else:
+                    self.cells[self.open_cells.pop()] = ''.join(element.itertext())
+            elif tag == 'tr' and event == 'end' and not self.open_cells:
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+
+    def feed(self, text):
+        if not self.fed and not text.strip():
+            return
+        self.fed = True
+        self.parser.feed(text)
+        self._drain()
+
+    def close(self):
+        if not self.fed:
+            return []
+        self.parser.close()
+        self._drain()
+        return self.cells
+
+
+def parse_page(html_content, dept_code, applicable_period, parser):
+    """Parse a whole results page into course rows. Runs in the batch parse processes; returns (rows, seconds)."""
+    start = time.perf_counter()
+    courses = list(iter_courses(PARSER_BACKENDS[parser](html_content), dept_code, applicable_period))
+    return courses, time.perf_counter() - start
+
+
+def cell_stream(parser):
+    """A fresh feed()/close() cell extractor for the named backend."""
+    if parser == 'lxml':
+        return LxmlCells()
+    return BufferedCells(PARSER_BACKENDS[parser])
+
+
+def iter_courses(course_cells, dept_code, applicable_period=None):
+    """Yield course dicts from a flat list of text02 cells, 14 per row.
+
+    Repeats of the same (catNo, section) get an occurrence suffix in their id.
+    """
+    seen = {}
+    for i in range(0, len(course_cells) - 13, 14):
+        course = course_from_cells(course_cells[i:i+14], dept_code, applicable_period)
+        if course['catNo']:
+            occurrence = seen.get(course['id'], 0)
+            seen[course['id']] = occurrence + 1
+            if occurrence:
+                course['id'] = course_id(applicable_period, dept_code, course['catNo'], course['section'], occurrence)
+            yield course
+
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36 OPR/114.0.0.0"
+COOKIES_PATH = os.path.join('.cache', 'aisis-cookies.json')
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+SESSION_MARKER = b"MY INDIVIDUAL PROGRAM OF STUDY"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class SessionExpiredError(Exception):
+    """AISIS answered with its login page instead of the requested page."""
+
+
+class TruncatedResponseError(requests.RequestException):
+    """The response body ended before its Content-Length."""
+
+
+def build_session(pool_size=4, retries=3, backoff=0.5):
+    """A requests.Session with pooled keep-alive connections, bounded exponential backoff and the default headers."""
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        # J_VCSC.do searches are read-only POSTs, so they are as safe to retry as GETs
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+    })
+    return session
+
 
 class AISISClient:
     def __init__(self):
-        self.base_url = 'https://aisis.ateneo.edu'
-        self.session = requests.Session()
-        self.cookies_file = 'cookies.pkl'
+        self.base_url = os.environ.get('AISIS_BASE_URL', 'https://aisis.ateneo.edu')
+        self.session = build_session(
+            pool_size=max(4, int(os.environ.get('SCRAPER_WORKERS', '4'))),
+            retries=int(os.environ.get('SCRAPER_RETRIES', '3')),
+            backoff=float(os.environ.get('SCRAPER_BACKOFF', '0.5')),
+        )
+        self.form_headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Origin": self.base_url,
+            "Referer": f"{self.base_url}/j_aisis/J_VCSC.do",
+        }
+        self.cookies_file = os.environ.get('AISIS_COOKIES_FILE', COOKIES_PATH)
         self.logged_in = False
+        self.credentials = None
+        self.session_generation = 0
+        self.auth_lock = threading.Lock()
+        self.cache = None
+        # Set by batch mode: pages are then parsed in these worker processes
+        self.parse_pool = None
+        self.metrics = scrape_metrics.RunMetrics(os.environ.get('SCRAPER_PROFILE') or None)
+        self.parser = os.environ.get('AISIS_PARSER', DEFAULT_PARSER)
+        if self.parser not in PARSER_BACKENDS:
+            log.warning(f"Unknown parser '{self.parser}', falling back to {DEFAULT_PARSER}")
+            self.parser = DEFAULT_PARSER
 
-        self._load_cookies()
+        with self.metrics.phase('probe'):
+            self._load_cookies()
 
     def _load_cookies(self):
-        """Load cookies from file if available and set them in session."""
-        if os.path.exists(self.cookies_file):
-            with open(self.cookies_file, 'rb') as file:
-                cookies = pickle.load(file)
-                self.session.cookies.update(cookies)
-            self.logged_in = self._is_session_valid()
-            if self.logged_in:
-                print("Loaded session from saved cookies.")
-            else:
-                print("Session expired, re-login required.")            
+        """Restore cookies saved by a previous run and keep them if the session is still alive."""
+        if not os.path.exists(self.cookies_file):
+            return
+        try:
+            with open(self.cookies_file, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            for cookie in saved:
+                self.session.cookies.set(
+                    cookie['name'], cookie['value'],
+                    domain=cookie.get('domain', ''), path=cookie.get('path', '/'),
+                    expires=cookie.get('expires'), secure=cookie.get('secure', False),
+                )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning(f"Ignoring unreadable cookie store {self.cookies_file}: {e}")
+            self.session.cookies.clear()
+            return
+        if not self.session.cookies:
+            return
+        self.logged_in = self._is_session_valid()
+        if self.logged_in:
+            print("Loaded session from saved cookies.")
+        else:
+            print("Session expired, re-login required.")
+            self.session.cookies.clear()
 
     def _is_session_valid(self):
-        """Check if the session is still valid by making an authenticated request."""
+        """Probe J_VMCS.do without following redirects and stop reading once the marker shows up."""
         try:
-            response = self.session.get(f"{self.base_url}/j_aisis/J_VMCS.do")
-            if not response.ok:
-                print(f"DEBUG: Session validation failed - HTTP {response.status_code}")
-                return False
-            if "MY INDIVIDUAL PROGRAM OF STUDY" not in response.text:
-                print("DEBUG: Session validation failed - 'MY INDIVIDUAL PROGRAM OF STUDY' not found in response")
-                print(f"DEBUG: Response URL: {response.url}")
-                print(f"DEBUG: Response preview (first 500 chars): {response.text[:500]}")
-                return False
-            return True
+            response = self.session.get(f"{self.base_url}/j_aisis/J_VMCS.do", allow_redirects=False, stream=True)
+            with response:
+                if response.is_redirect:
+                    log.debug(f"Session validation failed - redirected to {response.headers.get('Location')}")
+                    return False
+                if not response.ok:
+                    log.debug(f"Session validation failed - HTTP {response.status_code}")
+                    return False
+                tail = b""
+                for chunk in response.iter_content(chunk_size=8192):
+                    window = tail + chunk
+                    if SESSION_MARKER in window:
+                        return True
+                    tail = window[-len(SESSION_MARKER):]
+            log.debug("Session validation failed - 'MY INDIVIDUAL PROGRAM OF STUDY' not found in response")
+            return False
         except requests.RequestException as e:
-            print(f"DEBUG: Session validation error: {e}")
+            log.debug(f"Session validation error: {e}")
             return False
 
     def login(self, username, password):
         """Login and save cookies if not already logged in."""
+        self.credentials = (username, password)
         if self.logged_in:
             print("Already logged in.")
             return True
@@ -62,169 +358,490 @@ class AISISClient:
             "rnd": f"r{''.join(['%02x' % i for i in bytearray(os.urandom(10))])}"
         }
 
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-
         try:
-            response = self.session.post(login_url, data=form_data, headers=headers)
-            print(f"DEBUG: Login response status: {response.status_code}")
-            print(f"DEBUG: Login response URL: {response.url}")
+            response = self.session.post(login_url, data=form_data)
+            log.debug(f"Login response status: {response.status_code}, URL: {response.url}")
             
             if not response.ok:
-                print(f"DEBUG: Login failed - HTTP {response.status_code}")
-                print(f"DEBUG: Response preview (first 500 chars): {response.text[:500]}")
+                log.warning(f"Login failed - HTTP {response.status_code}")
+                log.debug(f"Response preview (first 500 chars): {response.text[:500]}")
                 return False
             
             if "User Identified As" not in response.text:
-                print("DEBUG: Login failed - 'User Identified As' not found in response")
-                print(f"DEBUG: Response preview (first 500 chars): {response.text[:500]}")
                 # Check for common error messages
                 if "Invalid" in response.text or "incorrect" in response.text.lower():
-                    print("DEBUG: Possible invalid credentials")
+                    log.warning("Login failed - possible invalid credentials")
                 elif "login" in response.text.lower():
-                    print("DEBUG: Response appears to be a login page (authentication may have failed)")
+                    log.warning("Login failed - got the login page back (authentication may have failed)")
+                else:
+                    log.warning("Login failed - 'User Identified As' not found in response")
+                log.debug(f"Response preview (first 500 chars): {response.text[:500]}")
                 return False
             
             self.logged_in = True
+            self.session_generation += 1
             self._save_cookies()
             print("Login successful and cookies saved.")
             return True
         except requests.RequestException as e:
-            print(f"DEBUG: Login error: {e}")
-            print(f"DEBUG: Error type: {type(e).__name__}")
+            log.warning(f"Login error ({type(e).__name__}): {e}")
             return False
 
+    def relogin(self, generation):
+        """Re-authenticate after a SessionExpiredError seen under `generation`.
+
+        Workers that hit the expiry together share one login: whoever gets the
+        lock first logs in, the rest see the new generation and just retry.
+        """
+        with self.auth_lock:
+            if self.session_generation != generation:
+                return self.logged_in
+            if self.credentials is None:
+                return False
+            log.info("Session expired, logging in again")
+            self.logged_in = False
+            self.session.cookies.clear()
+            return self.login(*self.credentials) and self.warmup()
+
     def _save_cookies(self):
-        """Save session cookies to a file."""
-        with open(self.cookies_file, 'wb') as file:
-            pickle.dump(self.session.cookies, file)
+        """Write session cookies as JSON, readable only by the current user."""
+        cookies = [
+            {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires,
+                'secure': bool(cookie.secure),
+            }
+            for cookie in self.session.cookies
+        ]
+        os.makedirs(os.path.dirname(self.cookies_file) or '.', exist_ok=True)
+        tmp_path = f"{self.cookies_file}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(cookies, file)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.cookies_file)
 
     def warmup(self):
+        """Open the class schedule search form, as a browser does before submitting it."""
         url = f"{self.base_url}/j_aisis/J_VCSC.do"
-        body = f"command=displayResults&applicablePeriod='2024-2'&deptCode='IE'&subjCode='ALL'"
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36 OPR/114.0.0.0",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Origin": "https://aisis.ateneo.edu",
-            "Referer": "https://aisis.ateneo.edu/j_aisis/J_VCSC.do"
-        }
-
         try:
-            print(f"DEBUG: Warmup request to {url}")
-            print(f"DEBUG: Warmup body: {body}")
-            response = self.session.post(url, data=body)
-            print(f"DEBUG: Warmup response status: {response.status_code}")
-            print(f"DEBUG: Warmup response URL: {response.url}")
+            response = self.session.get(url)
+            log.debug(f"Warmup request to {url}: HTTP {response.status_code}")
             
             if not response.ok:
-                print(f"DEBUG: Warmup failed - HTTP {response.status_code}")
-                print(f"DEBUG: Response preview (first 500 chars): {response.text[:500]}")
+                log.warning(f"Warmup failed - HTTP {response.status_code}")
+                log.debug(f"Response preview (first 500 chars): {response.text[:500]}")
                 return False
             
             # Check if we're still authenticated
             if "login" in response.url.lower() or "sign in" in response.text.lower():
-                print("DEBUG: Warmup failed - redirected to login page (session expired)")
+                log.warning("Warmup failed - redirected to login page (session expired)")
                 return False
             
             print("Good to go, starting script.")
             return True
         except requests.RequestException as e:
-            print(f"DEBUG: Warmup error: {e}")
-            print(f"DEBUG: Error type: {type(e).__name__}")
+            log.warning(f"Warmup error ({type(e).__name__}): {e}")
             return False
         
-    def get_course_results(self, applicable_period, dept_code):
-        """Retrieve course results for a given period and department, parse them, and save to JSON."""
+    def fetch_page(self, applicable_period, dept_code, feed):
+        """Fetch one department's results page, passing the decoded body to feed() as it arrives. Returns the response fingerprint.
+
+        feed is a cell stream's feed(), so the page is parsed while it
+        downloads and never held whole, or a list's append() where the page
+        text is needed (the batch parse processes). Time spent in feed() is
+        recorded as parse time. Raises SessionExpiredError if AISIS answers
+        with its login page.
+        """
         url = f"{self.base_url}/j_aisis/J_VCSC.do"
         body = f"command=displayResults&applicablePeriod={applicable_period}&deptCode={dept_code}&subjCode=ALL"
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36 OPR/114.0.0.0",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Origin": "https://aisis.ateneo.edu",
-            "Referer": "https://aisis.ateneo.edu/j_aisis/J_VCSC.do"
-        }
-        try:
-            print(f"DEBUG: Fetching courses for dept_code={dept_code}, period={applicable_period}")
-            response = self.session.post(url, data=body, headers=headers)
-            print(f"DEBUG: Course results response status: {response.status_code}")
-            print(f"DEBUG: Course results response URL: {response.url}")
-            
+        start = time.perf_counter()
+        response = self.session.post(url, data=body, headers=self.form_headers, stream=True)
+        with response:
+            retries = response.raw.retries
+            self.metrics.record(applicable_period, dept_code, requests=1, retries=len(retries.history) if retries else 0,
+                                status=response.status_code)
+
             if not response.ok:
-                print(f"DEBUG: Course results request failed - HTTP {response.status_code}")
-                print(f"DEBUG: Response preview (first 500 chars): {response.text[:500]}")
+                log.debug(f"Response preview (first 500 chars): {response.text[:500]}")
                 raise Exception(f"Request failed: {response.status_code}")
 
             # Check if we're still authenticated
-            if "login" in response.url.lower() or "sign in" in response.text.lower():
-                print(f"DEBUG: Course results failed - redirected to login page (session expired)")
-                raise Exception("Session expired during course fetch")
+            if "login" in response.url.lower():
+                log.debug(f"{dept_code}: redirected to the login page (session expired)")
+                raise SessionExpiredError("Session expired during course fetch")
+
+            fingerprint = response_cache.Fingerprint(f"{ROW_FORMAT_VERSION}|{self.parser}")
+            decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+            size = 0
+            tail = ''
+            feed_seconds = 0.0
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                size += len(chunk)
+                text = decoder.decode(chunk)
+                if "sign in" in (tail + text).lower():
+                    log.debug(f"{dept_code}: got the sign in page (session expired)")
+                    raise SessionExpiredError("Session expired during course fetch")
+                tail = text[-7:]
+                fingerprint.update(text)
+                feed_start = time.perf_counter()
+                feed(text)
+                feed_seconds += time.perf_counter() - feed_start
+            text = decoder.decode(b'', final=True)
+            fingerprint.update(text)
+            feed(text)
+            expected = response.headers.get('Content-Length')
+            if expected and expected.isdigit() and not response.headers.get('Content-Encoding') and size < int(expected):
+                raise TruncatedResponseError(f"Got {size} of {expected} bytes")
+            self.metrics.record(applicable_period, dept_code, bytes=size, parseSeconds=feed_seconds,
+                                requestSeconds=time.perf_counter() - start - feed_seconds)
+        return fingerprint.hexdigest()
+
+    def close_cells(self, stream, applicable_period, dept_code):
+        """Finish a cell stream fed by fetch_page and return its text02 cells."""
+        start = time.perf_counter()
+        course_cells = stream.close()
+        self.metrics.record(applicable_period, dept_code, parseSeconds=time.perf_counter() - start)
+        if len(course_cells) == 0:
+            log.debug(f"No course cells found for {dept_code}")
+        return course_cells
 
-            courses = self.parse_courses(response.text, dept_code)
-            print(f"DEBUG: Parsed {len(courses)} courses for {dept_code}")
+    def fetch_cells(self, applicable_period, dept_code):
+        """Fetch and parse one department's page, bypassing the response cache. Returns (cells, fingerprint)."""
+        stream = cell_stream(self.parser)
+        fingerprint = self.fetch_page(applicable_period, dept_code, stream.feed)
+        return self.close_cells(stream, applicable_period, dept_code), fingerprint
+
+    def _cached_rows(self, applicable_period, dept_code, fingerprint):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(applicable_period, dept_code, fingerprint)
+        if cached is not None:
+            self.metrics.record(applicable_period, dept_code, rows=len(cached), cacheHit=True)
+        return cached
+
+    def get_course_results(self, applicable_period, dept_code):
+        """Fetch and parse one department. Returns the course rows, or None on a network error.
+
+        In process the page is parsed into cells as it downloads, and a cache
+        hit skips building the rows. With a parse pool the page text is kept
+        and a cache hit skips sending it to the pool at all.
+        """
+        try:
+            if self.parse_pool is None:
+                stream = cell_stream(self.parser)
+                fingerprint = self.fetch_page(applicable_period, dept_code, stream.feed)
+                cached = self._cached_rows(applicable_period, dept_code, fingerprint)
+                if cached is not None:
+                    return cached
+                course_cells = self.close_cells(stream, applicable_period, dept_code)
+                parse_start = time.perf_counter()
+                courses = list(iter_courses(course_cells, dept_code, applicable_period))
+                self.metrics.record(applicable_period, dept_code, parseSeconds=time.perf_counter() - parse_start)
+            else:
+                chunks = []
+                fingerprint = self.fetch_page(applicable_period, dept_code, chunks.append)
+                cached = self._cached_rows(applicable_period, dept_code, fingerprint)
+                if cached is not None:
+                    return cached
+                courses, parse_seconds = self.parse_pool.submit(
+                    parse_page, ''.join(chunks), dept_code, applicable_period, self.parser).result()
+                self.metrics.record(applicable_period, dept_code, parseSeconds=parse_seconds)
+            if self.cache is not None:
+                self.cache.put(applicable_period, dept_code, fingerprint, courses)
+            self.metrics.record(applicable_period, dept_code, rows=len(courses), cacheHit=False)
             return courses
         except requests.RequestException as e:
-            print(f"DEBUG: Error fetching course results for {dept_code}: {e}")
-            print(f"DEBUG: Error type: {type(e).__name__}")
+            log.info(f"Error fetching course results for {dept_code} ({type(e).__name__}): {e}")
             return None
-        except Exception as e:
-            print(f"DEBUG: Unexpected error fetching courses for {dept_code}: {e}")
-            print(f"DEBUG: Error type: {type(e).__name__}")
-            raise
 
-    def parse_courses(self, html_content, dept_code):
+    def parse_courses(self, html_content, dept_code, applicable_period=None):
         """
         Parse full HTML content and return an array of course objects.
         
         Args:
             html_content (str): Full HTML string
+            dept_code (str): Department the page was fetched for
+            applicable_period (str): Period the page was fetched for, part of every course id
             
         Returns:
             list: Array of course information dictionaries
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        courses = []
-        
-        course_cells = soup.find_all('td', class_='text02')
-        print(f"DEBUG: Found {len(course_cells)} course cells for {dept_code}")
-        
+        course_cells = PARSER_BACKENDS[self.parser](html_content)
         if len(course_cells) == 0:
-            print(f"DEBUG: No course cells found for {dept_code}")
-            print(f"DEBUG: HTML preview (first 1000 chars): {html_content[:1000]}")
+            log.debug(f"No course cells found for {dept_code}; HTML preview (first 1000 chars): {html_content[:1000]}")
             # Check if we got an error page
             if "error" in html_content.lower() or "not found" in html_content.lower():
-                print(f"DEBUG: Possible error page detected for {dept_code}")
-        
-        for i in range(0, len(course_cells), 14):
-            if i + 13 < len(course_cells):
-                cells = course_cells[i:i+14]
-                time_text = cells[4].text.strip()
-                
-                course = {
-                    'id': str(uuid.uuid4()),
-                    'deptCode': dept_code,
-                    'catNo': re.sub(r'\s+', ' ', cells[0].text.strip().replace('\n', ' ')),
-                    'section': re.sub(r'\s+', ' ', cells[1].text.strip().replace('\n', ' ')),
-                    'courseTitle': re.sub(r'\s+', ' ', cells[2].text.strip().replace('\n', ' ')),
-                    'units': re.sub(r'\s+', ' ', cells[3].text.strip().replace('\n', ' ')),
-                    'time': re.sub(r'\(FULLY ONSITE\)|\(FULLY ONLINE\)|~|\(\)$', '', re.sub(r'\s+', ' ', time_text.replace('\n', ' '))).strip(),
-                    'room': "TBA" if "TBA" in cells[5].text else re.sub(r'\s+', ' ', cells[5].text.strip().replace('\n', ' ')),
-                    'instructor': re.sub(r'\s+', ' ', cells[6].text.strip().replace('\n', ' ')),
-                    'remarks': re.sub(r'\s+', ' ', cells[11].text.strip().replace('\n', ' '))
-                }
-                if course['catNo'] and not course['catNo'].isspace():
-                    courses.append(course)
+                log.warning(f"Possible error page detected for {dept_code}")
         
+        return list(iter_courses(course_cells, dept_code, applicable_period))
+
+
+def fetch_department(client, applicable_period, dept_code, limiter, max_attempts=3, retry_delay=2):
+    """Fetch one department. Returns the parsed courses, or None if it could not be fetched.
+
+    Connection errors and 429/5xx answers are already retried with backoff by the
+    session's adapter. Errors it does not cover, such as a read error or a
+    truncated body mid-stream, are retried here after retry_delay seconds
+    (doubling), and an expired session is re-established and the request
+    repeated, up to max_attempts requests in total.
+    """
+    for attempt in range(1, max_attempts + 1):
+        limiter.acquire()
+        generation = client.session_generation
+        try:
+            courses = client.get_course_results(applicable_period, dept_code)
+        except SessionExpiredError:
+            if attempt < max_attempts and client.relogin(generation):
+                client.metrics.record(applicable_period, dept_code, relogins=1)
+                continue
+            break
+        except Exception as e:
+            log.exception(f"Error retrieving courses for {dept_code}: {e}")
+            break
+        if courses is None:
+            if attempt < max_attempts:
+                client.metrics.record(applicable_period, dept_code, retries=1)
+                time.sleep(retry_delay * 2 ** (attempt - 1))
+                continue
+            break
+        if len(courses) == 0:
+            log.warning(f"No courses found for {dept_code} (empty list)")
         return courses
+    log.warning(f"Failed to retrieve courses for {dept_code} after {attempt} attempts")
+    return None
+
+
+def setup_cache(client):
+    """Attach the response cache (SCRAPER_CACHE, empty to disable) to a client."""
+    cache_path = os.environ.get('SCRAPER_CACHE', response_cache.CACHE_PATH)
+    if cache_path:
+        client.cache = ResponseCache(
+            cache_path,
+            max_entries=int(os.environ.get('SCRAPER_CACHE_MAX_ENTRIES', '500')),
+            max_age=float(os.environ.get('SCRAPER_CACHE_MAX_AGE_HOURS', '168')) * 3600,
+        )
+
+
+def save_cache(client):
+    """Persist the response cache, if enabled, and report its hit/miss counters."""
+    if client.cache is None:
+        return
+    client.cache.save()
+    print(f"Response cache: {client.cache.summary()}")
+
+
+_SNAPSHOT_SEPARATOR_RE = re.compile(r'[\s,]*')
+
+
+def iter_snapshot(path, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the rows of a courses.json one at a time, reading it in chunks rather than loading it whole."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as json_file:
+        buffer = json_file.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} is not a JSON array")
+        position = 1
+        at_end = False
+        while True:
+            position = _SNAPSHOT_SEPARATOR_RE.match(buffer, position).end()
+            if buffer.startswith(']', position):
+                return
+            try:
+                row, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # A row cut off at the end of the buffer: read on, unless there is nothing left to read
+                if at_end:
+                    raise
+                more = json_file.read(chunk_size)
+                at_end = not more
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            yield row
+
+
+class SnapshotRows:
+    """The rows of a courses.json as a re-iterable stream: every pass reads the file again, one row at a time."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        return iter_snapshot(self.path)
+
+
+def load_summary(path):
+    """course_deltas.summarize() of a previously written courses.json, or None if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return course_deltas.summarize(iter_snapshot(path))
+    except (OSError, ValueError) as e:
+        log.warning(f"Could not read previous snapshot {path}: {e}")
+        return None
+
+
+def previous_rows_by_dept(path, applicable_period, dept_codes=None):
+    """
+    Rows of the published snapshot grouped by deptCode, or {} if it is missing or from another period.
+
+    With dept_codes, only those departments are kept.
+    """
+    changelog = course_deltas.load_changelog()
+    if changelog is None or changelog.get('period') != applicable_period or not os.path.exists(path):
+        return {}
+    by_dept = {}
+    try:
+        for row in iter_snapshot(path):
+            if dept_codes is None or row.get('deptCode') in dept_codes:
+                by_dept.setdefault(row.get('deptCode'), []).append(row)
+    except (OSError, ValueError) as e:
+        log.warning(f"Could not read previous snapshot {path}: {e}")
+        return {}
+    return by_dept
+
+
+def record_history(applicable_period, output_path, row_count, rows=None):
+    """Add the run to the SQLite history (COURSE_HISTORY_DB, empty to disable). rows=None means the snapshot is unchanged."""
+    path = os.environ.get('COURSE_HISTORY_DB', course_history.HISTORY_PATH)
+    if not path:
+        return
+    history = course_history.CourseHistory(path)
+    try:
+        if rows is None and history.has_period(applicable_period):
+            run = history.record_unchanged(applicable_period, row_count)
+        else:
+            run = history.record_run(applicable_period, rows if rows is not None else SnapshotRows(output_path))
+    finally:
+        history.close()
+    print(f"History run {run['runId']} recorded in {path}: "
+          f"{run['added']} added, {run['modified']} modified, {run['removed']} removed")
+
+
+def _build_artifact(name, build, *args):
+    """Run one derived-artifact builder. A failure is logged and returns None, so the other artifacts still get built."""
+    try:
+        return build(*args)
+    except Exception:
+        log.exception(f"Could not build {name}")
+        return None
+
+
+def publish_artifacts(applicable_period, output_path, previous, all_courses):
+    """
+    Record the changelog and history of a newly published snapshot, then derive the optional artifacts.
+    Returns the changelog version.
+
+    `previous` is course_deltas.summarize() of the snapshot it replaced, or None.
+    `all_courses` is iterated once per artifact, so it can be SnapshotRows
+    over the published file instead of a list held in memory.
+    """
+    # Clients follow courses.json through the changelog, so it is written before anything that may fail
+    version = course_deltas.record_snapshot(previous or [], all_courses, applicable_period,
+                                           last_version=course_deltas.published_version())
+    record_history(applicable_period, output_path, None, all_courses)
+
+    if os.environ.get('COURSES_COLUMNAR') == '1':
+        written = _build_artifact("the columnar snapshot", course_columnar.write_columnar, all_courses)
+        for path, size in (written or {}).items():
+            log.debug(f"Wrote {path} ({size} bytes)")
+
+    if os.environ.get('COURSES_INDEXES') == '1':
+        manifest = _build_artifact("the department indexes", course_indexes.build_indexes, all_courses)
+        if manifest is not None:
+            log.debug(f"Wrote {len(manifest['departments'])} department shards to {course_indexes.INDEX_DIR}")
+
+    if os.environ.get('COURSES_SEARCH') == '1':
+        size = _build_artifact("the search index", course_search.build_index, all_courses)
+        if size is not None:
+            log.debug(f"Wrote {course_search.SEARCH_PATH} ({size} bytes)")
+
+    if os.environ.get('COURSES_ROOMS') == '1':
+        rooms = _build_artifact("the room index", room_index.write_room_index, all_courses, applicable_period)
+        if rooms is not None:
+            log.debug(f"Rebuilt {len(rooms['rebuilt'])} departments of {room_index.ROOM_INDEX_PATH}")
+
+    # Program views read this join instead of filtering every offering; skipped without data/programs.json
+    join = _build_artifact("the program join", program_offerings.write_join, all_courses, applicable_period)
+    if join is not None:
+        log.debug(f"Re-matched {len(join['rematched'])} departments into {program_offerings.JOIN_PATH}")
+    return version
+
+
+class SnapshotWriter:
+    """Writes courses.json department by department into a temporary file.
+
+    The output is byte-identical to json.dump(rows, f, indent=4). It is moved
+    over the real file with os.replace only if the bytes differ, so
+    readers never see a half-written file and an unchanged scrape leaves the
+    old file and its mtime alone.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(self.tmp_path, 'w')
+        self.count = 0
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        # json.dumps of the batch, minus its opening "[\n" and closing "\n]", is
+        # exactly the indented run of elements json.dump would have written
+        body = json.dumps(rows, indent=4)[2:-2]
+        self.file.write((',\n' if self.count else '[\n') + body)
+        self.count += len(rows)
+
+    def finish(self):
+        """Close the temporary file. Returns False, and discards it, if it matches the current snapshot byte for byte."""
+        self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+        if os.path.exists(self.path) and filecmp.cmp(self.tmp_path, self.path, shallow=False):
+            os.remove(self.tmp_path)
+            return False
+        return True
+
+    def publish(self):
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
 def main():
+    if '--daemon' in sys.argv[1:]:
+        import scraper_daemon
+        sys.exit(scraper_daemon.main())
+    if os.environ.get('APPLICABLE_PERIODS'):
+        import batch_scraper
+        sys.exit(batch_scraper.main())
+    scrape_metrics.setup_logging()
     client = AISISClient()
+    try:
+        run(client)
+    finally:
+        finish_run(client)
+
+
+def finish_run(client):
+    """Print the run summary and write the JSON report (SCRAPER_REPORT, empty to disable)."""
+    metrics = client.metrics
+    print(metrics.summary())
+    report_path = os.environ.get('SCRAPER_REPORT', scrape_metrics.REPORT_PATH)
+    if report_path:
+        scrape_metrics.write_report(metrics.report(parser=client.parser), report_path)
+        print(f"Run report written to {report_path}")
+
+
+def run(client):
+    metrics = client.metrics
     
     # Get credentials and period from environment variables
     username = os.environ.get('AISIS_USERNAME')
@@ -236,81 +853,129 @@ def main():
         sys.exit(1)
     
     print(f"Running scraper for period: {applicable_period}")
-    print(f"DEBUG: Username provided: {'Yes' if username else 'No'}")
-    print(f"DEBUG: Password provided: {'Yes' if password else 'No'}")
-    print(f"DEBUG: Cookies file exists: {os.path.exists(client.cookies_file)}")
-    print(f"DEBUG: Current session cookies: {len(client.session.cookies)} cookies")
     
-    if not client.session.cookies:
-        print("DEBUG: No cookies in session")
-    if not client.login(username, password):
-        print("DEBUG: Login failed - exiting")
+    with metrics.phase('login'):
+        logged_in = client.login(username, password)
+    if not logged_in:
+        log.error("Login failed - exiting")
         sys.exit(1)
     
-    print(f"DEBUG: After login - logged_in={client.logged_in}, cookies={len(client.session.cookies)}")
-    
-    dept_codes = [
-        "**IE**", 
-        "BIO", "CH", "CHN", "COM", "CEPP", "CPA", "ELM", "DS", 
-        "EC", "ECE", "EN", "ES", "EU", "FIL", "FAA", "FA", "HSP", 
-        "HI", "SOHUM", "DISCS", "SALT", "INTAC", "IS", "JSP", "KSP", 
-        "LAS", "MAL", "MA", "ML", "NSTP (ADAST)", "NSTP (OSCI)", 
-        "PH", "PE", "PS", "POS", "PSY", "QMIT", "SB", "SOCSCI", 
-        "SA", "TH", "TMP"
-    ]
-    
-    all_courses = []
-    
     # Run warmup before starting
-    warmup_response = client.warmup()
+    with metrics.phase('warmup'):
+        warmup_response = client.warmup()
     if not warmup_response:
         print("Warmup failed, aborting scraper run.")
         sys.exit(1)
 
-    for dept_code in dept_codes:
-        attempt = 0
-        max_attempts = 2
-        while attempt < max_attempts:
-            try:
-                courses = client.get_course_results(applicable_period, dept_code)
-                if courses is None:
-                    print(f"DEBUG: get_course_results returned None for {dept_code}")
-                    attempt += 1
-                    if attempt >= max_attempts:
-                        print(f"DEBUG: Failed to retrieve courses for {dept_code} after {max_attempts} attempts (returned None). Exiting.")
-                        sys.exit(1)
-                    continue
-                elif len(courses) == 0:
-                    print(f"DEBUG: Warning - No courses found for {dept_code} (empty list)")
-                else:
-                    all_courses.extend(courses)
-                    print(f"DEBUG: Successfully retrieved {len(courses)} courses for {dept_code}")
-                time.sleep(1)
-                break  # Success, break out of retry loop
-            except Exception as e:
-                attempt += 1
-                print(f"DEBUG: Error retrieving courses for {dept_code} (attempt {attempt}/{max_attempts}): {e}")
-                print(f"DEBUG: Traceback:\n{traceback.format_exc()}")
-                if attempt >= max_attempts:
-                    print(f"DEBUG: Failed to retrieve courses for {dept_code} after {max_attempts} attempts. Exiting.")
-                    sys.exit(1)
-                time.sleep(2)  # Wait before retry
-
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
-    
-    print(f"DEBUG: Total courses collected: {len(all_courses)}")
-    if len(all_courses) == 0:
-        print("DEBUG: WARNING - No courses were collected! This may indicate a problem.")
-        sys.exit(1)
-    
-    # Save to data/courses.json
+    setup_cache(client)
+
+    workers = max(1, int(os.environ.get('SCRAPER_WORKERS', '4')))
+    limiter = RateLimiter(float(os.environ.get('SCRAPER_RATE', '1')))
+    log.debug(f"Fetching {len(DEPT_CODES)} departments with {workers} workers at {limiter.rate} req/s")
+
     output_path = os.path.join('data', 'courses.json')
-    with open(output_path, "w") as json_file:
-        json.dump(all_courses, json_file, indent=4)
+    writer = SnapshotWriter(output_path)
+
+    on_failure = os.environ.get('SCRAPER_ON_FAILURE', 'fail')
+    if on_failure not in ('fail', 'partial'):
+        log.warning(f"Unknown SCRAPER_ON_FAILURE '{on_failure}', using 'fail'")
+        on_failure = 'fail'
+    checkpoints = scrape_checkpoints.CheckpointStore(applicable_period)
+    resume = os.environ.get('SCRAPER_RESUME') == '1'
+    resume_max_age = float(os.environ.get('SCRAPER_RESUME_MAX_AGE_HOURS', '24')) * 3600
+
+    # deptCode -> when its checkpoint was fetched, for departments taken from a checkpoint
+    resumed = {}
+
+    def start(dept_code):
+        if resume:
+            checkpoint = checkpoints.load_entry(dept_code, resume_max_age)
+            if checkpoint is not None:
+                resumed[dept_code] = checkpoint['fetched']
+                metrics.record(applicable_period, dept_code, rows=len(checkpoint['rows']), resumed=True)
+                future = Future()
+                future.set_result(checkpoint['rows'])
+                return dept_code, future
+        return dept_code, pool.submit(fetch_department, client, applicable_period, dept_code, limiter)
+
+    # Departments are written in DEPT_CODES order so the output matches a serial
+    # run, and only a small window is in flight so finished-but-unwritten
+    # results stay bounded however many departments there are.
+    failed = []
+    stale = []
+    with metrics.phase('fetch'):
+        pool = ThreadPoolExecutor(max_workers=workers, initializer=metrics.profile_thread)
+        departments = iter(DEPT_CODES)
+        pending = deque(start(dept_code) for dept_code in itertools.islice(departments, workers * 2))
+        while pending:
+            dept_code, future = pending.popleft()
+            courses = future.result()
+            if courses is None:
+                failed.append(dept_code)
+                courses = []
+                if on_failure == 'partial':
+                    entry = {'deptCode': dept_code, 'reason': 'fetch failed'}
+                    checkpoint = checkpoints.load_entry(dept_code)
+                    if checkpoint is not None:
+                        courses = checkpoint['rows']
+                        entry['fetched'] = int(checkpoint['fetched'] * 1000)
+                    else:
+                        # Only this department's rows are read back from the published snapshot
+                        courses = previous_rows_by_dept(output_path, applicable_period, {dept_code}).get(dept_code, [])
+                    entry['rows'] = len(courses)
+                    stale.append(entry)
+                    metrics.record(applicable_period, dept_code, stale=True)
+            elif dept_code in resumed:
+                stale.append({'deptCode': dept_code, 'reason': 'resumed from checkpoint', 'rows': len(courses),
+                              'fetched': int(resumed[dept_code] * 1000)})
+            else:
+                checkpoints.save(dept_code, courses)
+            writer.write_rows(courses)
+            for next_dept in itertools.islice(departments, 1):
+                pending.append(start(next_dept))
+        pool.shutdown()
+    save_cache(client)
+
+    if failed and (on_failure == 'fail' or len(failed) == len(DEPT_CODES)):
+        writer.abort()
+        print(f"Failed to fetch {len(failed)} of {len(DEPT_CODES)} departments: {', '.join(failed)}")
+        print("The others are checkpointed; rerun with SCRAPER_RESUME=1 to fetch only the missing departments.")
+        sys.exit(1)
+    if failed:
+        print(f"Publishing a partial snapshot, {len(failed)} departments failed: {', '.join(failed)}")
+    if resumed:
+        print(f"{len(resumed)} departments taken from checkpoints of an earlier run, listed in "
+              f"{scrape_checkpoints.STALE_PATH}")
+
+    log.debug(f"Total courses collected: {writer.count}")
+    if writer.count == 0:
+        log.warning("No courses were collected! This may indicate a problem.")
+        writer.abort()
+        sys.exit(1)
+
+    scrape_checkpoints.write_stale(applicable_period, stale)
+    status = 'partial' if failed else 'ok'
+
+    with metrics.phase('write'):
+        if not writer.finish():
+            # The published snapshot stands, so a later run must fetch afresh rather than resume
+            checkpoints.clear()
+            metrics.status = 'unchanged' if status == 'ok' else status
+            print(f"No changes since the previous snapshot, leaving {output_path} untouched")
+            record_history(applicable_period, output_path, writer.count)
+            return
+        # Only ids and row digests of the replaced snapshot are kept, and the
+        # artifacts stream the new one, so no snapshot's rows are held whole
+        previous = load_summary(output_path)
+        writer.publish()
+        checkpoints.clear()
+
+        print(f"All courses have been written to {output_path}")
+        log.debug(f"File size: {os.path.getsize(output_path)} bytes")
 
-    print(f"All courses have been written to {output_path}")
-    print(f"DEBUG: File size: {os.path.getsize(output_path)} bytes")
+        version = publish_artifacts(applicable_period, output_path, previous, SnapshotRows(output_path))
+    metrics.status = status
+    print(f"Changelog updated to version {version} at {course_deltas.CHANGELOG_PATH}")
 
 if __name__ == "__main__":
     main()
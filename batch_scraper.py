@@ -0,0 +1,185 @@
+"""
+Batch mode for aisis_scraper.py: several periods in one run.
+
+    APPLICABLE_PERIODS="2025-0,2025-1,2025-2" python aisis_scraper.py
+    python batch_scraper.py 2025-1 2025-2
+
+One login and warmup serve every period. All (period, department) fetches
+share the session and the SCRAPER_RATE limit on SCRAPER_WORKERS threads.
+Pages are parsed in SCRAPER_PARSE_PROCESSES worker processes (default one per
+CPU), so parsing scales across cores while the threads keep the network busy;
+at most SCRAPER_WORKERS pages are parsed at once, so raise it to use more
+processes. The worker processes are spawned rather than forked, since the
+pool is started while the session's threads are running. A cached page
+(unchanged fingerprint) is not parsed at all.
+
+Every period is written to BATCH_OUTPUT_DIR/<period>/ (default data/periods):
+courses.json, in the same format as data/courses.json, and semester-info.json.
+A period with a department that could not be fetched is not published, and
+its departments not yet started are skipped; the others still are.
+data/courses.json, its changelog and the derived artifacts stay with the
+single-period run. The run report lists the departments of every period.
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import scrape_metrics
+from aisis_scraper import (
+    DEPT_CODES, AISISClient, RateLimiter, SnapshotRows, SnapshotWriter, fetch_department, finish_run,
+    record_history, save_cache, setup_cache,
+)
+
+BATCH_DIR = os.path.join('data', 'periods')
+SEMESTER_NAMES = {'0': "Intersession", '1': "First Semester", '2': "Second Semester"}
+_PERIOD_RE = re.compile(r'^\d{4}-\d$')
+
+log = logging.getLogger(f"{scrape_metrics.LOGGER_NAME}.batch")
+
+
+def semester_string(applicable_period):
+    """'2025-1' -> 'First Semester 2025-2026', as the workflow writes it."""
+    year, _, suffix = applicable_period.partition('-')
+    if not year.isdigit() or suffix not in SEMESTER_NAMES:
+        return "Unknown Semester"
+    return f"{SEMESTER_NAMES[suffix]} {year}-{int(year) + 1}"
+
+
+def write_semester_info(applicable_period, path):
+    info = {
+        'period': applicable_period,
+        'semesterString': semester_string(applicable_period),
+        'lastUpdated': int(time.time() * 1000),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return info
+
+
+def parse_periods(value):
+    """'2025-1, 2025-2' -> ['2025-1', '2025-2'], without duplicates."""
+    periods = list(dict.fromkeys(period.strip() for period in re.split(r'[,\s]+', value) if period.strip()))
+    for period in periods:
+        if not _PERIOD_RE.match(period):
+            raise ValueError(f"Period '{period}' is not YYYY-N")
+    return periods
+
+
+def run_batch(client, periods):
+    metrics = client.metrics
+    username = os.environ.get('AISIS_USERNAME')
+    password = os.environ.get('AISIS_PASSWORD')
+    if not username or not password:
+        log.error("AISIS credentials not found in environment variables")
+        return 1
+
+    log.info(f"Running batch scraper for periods: {', '.join(periods)}")
+    with metrics.phase('login'):
+        logged_in = client.login(username, password)
+    if not logged_in:
+        log.error("Login failed, not running the batch")
+        return 1
+    with metrics.phase('warmup'):
+        warmed_up = client.warmup()
+    if not warmed_up:
+        log.error("Warmup failed, not running the batch")
+        return 1
+    setup_cache(client)
+
+    workers = max(1, int(os.environ.get('SCRAPER_WORKERS', '4')))
+    processes = max(1, int(os.environ.get('SCRAPER_PARSE_PROCESSES') or os.cpu_count() or 1))
+    limiter = RateLimiter(float(os.environ.get('SCRAPER_RATE', '1')))
+    out_dir = os.environ.get('BATCH_OUTPUT_DIR', BATCH_DIR)
+    writers = {period: SnapshotWriter(os.path.join(out_dir, period, 'courses.json')) for period in periods}
+    failed = {period: [] for period in periods}
+    log.debug(f"Fetching {len(periods) * len(DEPT_CODES)} pages with {workers} workers at {limiter.rate} req/s, "
+              f"parsing in {processes} processes")
+
+    # Jobs run period by period in DEPT_CODES order, so each period's rows are
+    # written in the same order as a single-period run. The generator is lazy,
+    # so a period that has failed schedules none of its remaining departments.
+    jobs = ((period, dept_code) for period in periods for dept_code in DEPT_CODES if not failed[period])
+    with metrics.phase('fetch'):
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as parse_pool, \
+                ThreadPoolExecutor(max_workers=workers, initializer=metrics.profile_thread) as pool:
+            client.parse_pool = parse_pool
+
+            def start(job):
+                return job, pool.submit(fetch_department, client, job[0], job[1], limiter)
+
+            try:
+                pending = deque(start(job) for job in itertools.islice(jobs, workers * 2))
+                while pending:
+                    (period, dept_code), future = pending.popleft()
+                    if failed[period] and future.cancel():
+                        pending.extend(start(job) for job in itertools.islice(jobs, 1))
+                        continue
+                    courses = future.result()
+                    if courses is None:
+                        failed[period].append(dept_code)
+                    elif not failed[period]:
+                        writers[period].write_rows(courses)
+                    pending.extend(start(job) for job in itertools.islice(jobs, 1))
+            finally:
+                client.parse_pool = None
+    save_cache(client)
+
+    published = []
+    with metrics.phase('write'):
+        for period in periods:
+            writer = writers[period]
+            if failed[period] or writer.count == 0:
+                writer.abort()
+                reason = f"failed to fetch {', '.join(failed[period])}" if failed[period] else "no courses collected"
+                log.warning(f"{period}: {reason}, not published")
+                continue
+            info_path = os.path.join(os.path.dirname(writer.path), 'semester-info.json')
+            if writer.finish():
+                writer.publish()
+                record_history(period, writer.path, writer.count, SnapshotRows(writer.path))
+                log.info(f"{period}: {writer.count} courses written to {writer.path}")
+            else:
+                record_history(period, writer.path, writer.count)
+                log.info(f"{period}: no changes, leaving {writer.path} untouched")
+                if os.path.exists(info_path):
+                    published.append(period)
+                    continue
+            info = write_semester_info(period, info_path)
+            log.info(f"{period}: {info['semesterString']}")
+            published.append(period)
+
+    if len(published) == len(periods):
+        metrics.status = 'ok'
+        return 0
+    metrics.status = 'partial' if published else 'failed'
+    return 1
+
+
+def main():
+    try:
+        periods = parse_periods(' '.join(sys.argv[1:]) or os.environ.get('APPLICABLE_PERIODS', ''))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if not periods:
+        print("Error: no periods given; pass them as arguments or set APPLICABLE_PERIODS")
+        return 1
+    scrape_metrics.setup_logging()
+    client = AISISClient()
+    try:
+        return run_batch(client, periods)
+    finally:
+        finish_run(client)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
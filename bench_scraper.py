@@ -0,0 +1,230 @@
+"""
+End-to-end scraper benchmark against the local fake AISIS (fake_aisis.py).
+
+Runs the real aisis_scraper.main() flow and reports wall time, requests per
+second, parse time per department and peak RSS, then sweeps synthetic
+department sizes to show how parse_courses scales with each parser backend.
+
+    python bench_scraper.py --scale 1 --latency 0.05 --sweep 1,10,100
+    python bench_scraper.py --check-parsers [recorded_pages/]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import codecs
+import tempfile
+import functools
+import contextlib
+
+import aisis_scraper
+from fake_aisis import FakeAISIS, generate_department_page
+
+FIXTURE_PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'fixtures', 'aisis')
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@contextlib.contextmanager
+def _environ(**values):
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update({key: str(value) for key, value in values.items()})
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run_end_to_end(scale=1, latency=0.0, error_rate=0.0, expire_after=0, pages_dir=None,
+                   workers=4, rate=0, parser=None, period='2024-2'):
+    """Run main() against a fresh fake server and return the measurements."""
+    server = FakeAISIS(pages_dir=pages_dir, scale=scale, latency=latency,
+                       error_rate=error_rate, expire_after=expire_after).start()
+    workdir = tempfile.TemporaryDirectory(prefix='aisis-bench-')
+    previous_dir = os.getcwd()
+    env = {
+        'AISIS_BASE_URL': server.base_url,
+        'AISIS_USERNAME': 'bench',
+        'AISIS_PASSWORD': 'bench',
+        'APPLICABLE_PERIOD': period,
+        'SCRAPER_WORKERS': workers,
+        'SCRAPER_RATE': rate,
+    }
+    if parser:
+        env['AISIS_PARSER'] = parser
+    exit_code = 0
+    try:
+        os.chdir(workdir.name)
+        with _environ(**env), open(os.devnull, 'w') as devnull:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(devnull):
+                try:
+                    aisis_scraper.main()
+                except SystemExit as e:
+                    exit_code = e.code or 0
+            wall = time.perf_counter() - start
+        output_path = os.path.join(workdir.name, 'data', 'courses.json')
+        rows = 0
+        if os.path.exists(output_path):
+            with open(output_path, 'r', encoding='utf-8') as f:
+                rows = len(json.load(f))
+        # Parse time per department comes from the run report the scraper writes
+        report_path = os.path.join(workdir.name, aisis_scraper.scrape_metrics.REPORT_PATH)
+        parse_times = {}
+        if os.path.exists(report_path):
+            report = aisis_scraper.scrape_metrics.load_report(report_path)
+            parse_times = {dept: entry.get('parseSeconds', 0.0)
+                           for departments in report['departments'].values() for dept, entry in departments.items()}
+    finally:
+        os.chdir(previous_dir)
+        workdir.cleanup()
+        server.shutdown()
+        server.server_close()
+
+    return {
+        'exitCode': exit_code,
+        'wallSeconds': round(wall, 3),
+        'requests': server.requests,
+        'requestsPerSecond': round(server.requests / wall, 2) if wall else 0,
+        'injectedErrors': server.errors,
+        'bytesServed': server.bytes_sent,
+        'rows': rows,
+        'parseSeconds': {dept: round(seconds, 4) for dept, seconds in parse_times.items()},
+        'peakRssMb': round(peak_rss_mb(), 1),
+    }
+
+
+def parse_sweep(scales, dept_code='DISCS', repeat=3):
+    """Time parse_courses on synthetic pages of growing size for every available backend."""
+    client = aisis_scraper.AISISClient.__new__(aisis_scraper.AISISClient)
+    results = []
+    for scale in scales:
+        html_content = generate_department_page(dept_code, scale)
+        for backend in aisis_scraper.PARSER_BACKENDS:
+            client.parser = backend
+            best = None
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    rows = client.parse_courses(html_content, dept_code)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+            results.append({
+                'scale': scale,
+                'parser': backend,
+                'htmlBytes': len(html_content.encode('utf-8')),
+                'rows': len(rows),
+                'seconds': round(best, 4),
+                'rowsPerSecond': round(len(rows) / best) if best else 0,
+            })
+    return results
+
+
+def _stream_lxml(html_content, chunk_size=aisis_scraper.STREAM_CHUNK_SIZE):
+    """Cells from LxmlCells fed the page in byte chunks, decoded incrementally as fetch_page does."""
+    stream = aisis_scraper.LxmlCells()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    data = html_content.encode('utf-8')
+    for start in range(0, len(data), chunk_size):
+        stream.feed(decoder.decode(data[start:start + chunk_size]))
+    stream.feed(decoder.decode(b'', final=True))
+    return stream.close()
+
+
+def check_parsers(pages):
+    """Compare every backend, and streaming LxmlCells, on the given {name: html} pages.
+
+    Returns a list of mismatch descriptions.
+    """
+    backends = dict(aisis_scraper.PARSER_BACKENDS)
+    if aisis_scraper.lxml is not None:
+        for chunk_size in (7, aisis_scraper.STREAM_CHUNK_SIZE):
+            backends[f'LxmlCells/{chunk_size}'] = functools.partial(_stream_lxml, chunk_size=chunk_size)
+    mismatches = []
+    for name, html_content in pages.items():
+        outputs = {}
+        for backend, cells_of in backends.items():
+            rows = aisis_scraper.iter_courses(cells_of(html_content), name, None)
+            outputs[backend] = [{k: v for k, v in row.items() if k != 'id'} for row in rows]
+        reference = outputs.pop('html.parser')
+        for backend, rows in outputs.items():
+            if rows != reference:
+                mismatches.append(f"{name}: {backend} gave {len(rows)} rows, html.parser gave {len(reference)}")
+    return mismatches, list(backends)
+
+
+def _load_pages(pages_dir):
+    pages = {}
+    for filename in sorted(os.listdir(pages_dir)):
+        if filename.endswith('.html'):
+            with open(os.path.join(pages_dir, filename), 'r', encoding='utf-8') as f:
+                pages[filename[:-len('.html')]] = f.read()
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AISIS scraper offline.")
+    parser.add_argument('--scale', type=float, default=1)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--expire-after', type=int, default=0)
+    parser.add_argument('--pages', help="directory of recorded <deptCode>.html pages to serve")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0, help="SCRAPER_RATE for the run (0 = unlimited)")
+    parser.add_argument('--parser', choices=sorted(aisis_scraper.PARSER_BACKENDS))
+    parser.add_argument('--sweep', default='1,10,100', help="comma-separated synthetic scales for the parse sweep")
+    parser.add_argument('--check-parsers', metavar='DIR', nargs='?', const=FIXTURE_PAGES,
+                        help=f"only compare parser backends on saved pages (default {FIXTURE_PAGES}); "
+                             f"'synthetic' uses generated ones")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.check_parsers is not None:
+        if args.check_parsers == 'synthetic':
+            pages = {dept: generate_department_page(dept, 5) for dept in aisis_scraper.DEPT_CODES[:5]}
+        else:
+            pages = _load_pages(args.check_parsers)
+        mismatches, backends = check_parsers(pages)
+        for mismatch in mismatches:
+            print(f"MISMATCH {mismatch}")
+        print(f"Compared {len(pages)} pages across {', '.join(backends)}: "
+              f"{'OK' if not mismatches else f'{len(mismatches)} mismatches'}")
+        return 1 if mismatches else 0
+
+    run = run_end_to_end(args.scale, args.latency, args.error_rate, args.expire_after, args.pages,
+                         args.workers, args.rate, args.parser)
+    parse_total = sum(run['parseSeconds'].values())
+    print(f"End-to-end run (scale={args.scale}, latency={args.latency}s, workers={args.workers})")
+    print(f"  exit code        {run['exitCode']}")
+    print(f"  wall time        {run['wallSeconds']:.2f} s")
+    print(f"  requests         {run['requests']} ({run['requestsPerSecond']:.1f} req/s, {run['injectedErrors']} injected errors)")
+    print(f"  rows written     {run['rows']}")
+    print(f"  parse time       {parse_total:.3f} s total, "
+          f"{parse_total / max(1, len(run['parseSeconds'])) * 1000:.1f} ms per department")
+    print(f"  peak RSS         {run['peakRssMb']:.1f} MiB")
+
+    sweep = parse_sweep([float(scale) for scale in args.sweep.split(',') if scale])
+    print("\nparse_courses scaling")
+    print(f"  {'scale':>6} {'parser':<12} {'rows':>7} {'html KiB':>9} {'seconds':>9} {'rows/s':>9}")
+    for result in sweep:
+        print(f"  {result['scale']:>6g} {result['parser']:<12} {result['rows']:>7} "
+              f"{result['htmlBytes'] / 1024:>9.0f} {result['seconds']:>9.4f} {result['rowsPerSecond']:>9}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'run': run, 'sweep': sweep}, f, indent=2)
+    return 0 if run['exitCode'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
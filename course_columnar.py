@@ -0,0 +1,149 @@
+"""
+Compact columnar encoding of courses.json.
+
+Rows are stored column by column. String columns with many repeats
+(deptCode, units, room, instructor, remarks, courseTitle, ...) are
+dictionary-encoded as a list of distinct values plus one integer code per
+row. write_columnar also writes gzip and, when the optional brotli package is
+installed, brotli copies for static serving.
+
+    python course_columnar.py data/courses.json   # size / decode-time comparison
+"""
+import os
+import sys
+import json
+import gzip
+import time
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only the .br copy is skipped
+    brotli = None
+
+FORMAT = 'courses-columnar'
+VERSION = 1
+COLUMNAR_PATH = os.path.join('data', 'courses.columnar.json')
+
+
+def _encode_column(values):
+    if values and all(isinstance(value, str) for value in values):
+        distinct = {}
+        codes = [distinct.setdefault(value, len(distinct)) for value in values]
+        if len(distinct) <= len(values) // 2:
+            return {'dict': list(distinct), 'codes': codes}
+    return {'values': values}
+
+
+def _decode_column(column):
+    if 'dict' in column:
+        dictionary = column['dict']
+        return [dictionary[code] for code in column['codes']]
+    return column['values']
+
+
+def to_columnar(rows):
+    """Encode course dicts, read in one pass. Every row must have the same keys in the same order."""
+    fields = None
+    values = {}
+    count = 0
+    for row in rows:
+        if fields is None:
+            fields = list(row)
+            values = {field: [] for field in fields}
+        elif list(row) != fields:
+            raise ValueError(f"Row {row.get('id')} does not have the fields {fields}")
+        for field in fields:
+            values[field].append(row[field])
+        count += 1
+    fields = fields or []
+    return {
+        'format': FORMAT,
+        'version': VERSION,
+        'count': count,
+        'fields': fields,
+        'columns': {field: _encode_column(values[field]) for field in fields},
+    }
+
+
+def from_columnar(doc):
+    """Decode back to the row format written to data/courses.json."""
+    if doc.get('format') != FORMAT or doc.get('version') != VERSION:
+        raise ValueError(f"Unsupported columnar document: {doc.get('format')} v{doc.get('version')}")
+    fields = doc['fields']
+    columns = [_decode_column(doc['columns'][field]) for field in fields]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+
+def dumps(rows):
+    return json.dumps(to_columnar(rows), separators=(',', ':'), ensure_ascii=False)
+
+
+def write_columnar(rows, path=COLUMNAR_PATH):
+    """Write the columnar file plus precompressed copies. Returns {path: size in bytes}."""
+    data = dumps(rows).encode('utf-8')
+    outputs = {path: data, f"{path}.gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        outputs[f"{path}.br"] = brotli.compress(data, quality=11)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    for output_path, content in outputs.items():
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, output_path)
+    return {output_path: len(content) for output_path, content in outputs.items()}
+
+
+def read_columnar(path=COLUMNAR_PATH):
+    """Read a columnar file (plain or .gz) back into rows."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return from_columnar(json.load(f))
+
+
+def _best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare(rows):
+    """Size and decode time of the current row file against the columnar format."""
+    variants = {
+        'rows (indent=4)': (json.dumps(rows, indent=4).encode('utf-8'), json.loads),
+        'rows (compact)': (json.dumps(rows, separators=(',', ':')).encode('utf-8'), json.loads),
+        'columnar': (dumps(rows).encode('utf-8'), lambda data: from_columnar(json.loads(data))),
+    }
+    results = []
+    for name, (data, decode) in variants.items():
+        if decode(data) != rows:
+            raise AssertionError(f"{name} does not round-trip")
+        result = {
+            'format': name,
+            'bytes': len(data),
+            'gzipBytes': len(gzip.compress(data, compresslevel=9, mtime=0)),
+            'brotliBytes': len(brotli.compress(data, quality=11)) if brotli is not None else None,
+            'decodeMs': round(_best_of(lambda: decode(data)) * 1000, 2),
+        }
+        results.append(result)
+    return results
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join('data', 'courses.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    print(f"{len(rows)} rows from {path}")
+    print(f"{'format':<16} {'bytes':>10} {'gzip':>9} {'brotli':>9} {'decode ms':>10}")
+    for result in compare(rows):
+        brotli_bytes = result['brotliBytes'] if result['brotliBytes'] is not None else '-'
+        print(f"{result['format']:<16} {result['bytes']:>10} {result['gzipBytes']:>9} "
+              f"{brotli_bytes:>9} {result['decodeMs']:>10}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Versioned changelog of section-level changes between course snapshots.
+
+Each scrape that changes data/courses.json appends one entry to
+data/courses-changelog.json listing the sections added, removed and modified
+since the previous snapshot, and the new order of the section ids when it
+changed in a way the additions do not explain. data/semester-info.json
+carries the version of the published snapshot as changelogVersion. A client
+holding snapshot version N applies the entries after N instead of
+downloading the whole file again:
+
+    changelog = load_changelog()
+    deltas = deltas_since(changelog, my_version)
+    if deltas is None:
+        ...  # too old, fetch data/courses.json again
+    else:
+        courses = apply_deltas(courses, deltas)
+"""
+import os
+import json
+import logging
+import itertools
+import time
+import hashlib
+
+log = logging.getLogger('aisis_scraper')
+
+CHANGELOG_PATH = os.path.join('data', 'courses-changelog.json')
+SEMESTER_INFO_PATH = os.path.join('data', 'semester-info.json')
+MAX_ENTRIES = 50
+
+
+def row_digest(row):
+    """Short hash of a row's content, enough to tell whether it changed."""
+    return hashlib.blake2b(json.dumps(row, separators=(',', ':')).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def summarize(rows):
+    """
+    [(id, deptCode, digest)] of a snapshot in order.
+
+    This is all compute_delta needs of the old snapshot, so a run can drop
+    the previous rows before loading the new ones.
+    """
+    return [(row['id'], row.get('deptCode'), row_digest(row)) for row in rows]
+
+
+def department_runs(rows):
+    """
+    Yield (deptCode, rows) per department, holding one department's rows at a time.
+
+    courses.json keeps every department's rows together; rows of a department
+    that come back after another one's raise ValueError.
+    """
+    done = set()
+    for dept_code, group in itertools.groupby(rows, key=lambda row: row['deptCode']):
+        if dept_code in done:
+            raise ValueError(f"Rows of {dept_code} are not grouped together")
+        done.add(dept_code)
+        yield dept_code, list(group)
+
+
+def department_digest(rows):
+    """Digest of one department's rows, in order. Derived artifacts store it to tell which departments they are current for."""
+    digest = hashlib.blake2b(digest_size=8)
+    for row in rows:
+        digest.update(json.dumps(row, separators=(',', ':')).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def department_digests(rows):
+    """{deptCode: department_digest()} of a snapshot."""
+    return {dept_code: department_digest(dept_rows) for dept_code, dept_rows in department_runs(rows)}
+
+
+def compute_delta(old, new):
+    """
+    Diff two snapshots by course id. `old` is the rows or their summarize().
+
+    Added sections carry their index in `new`. When removing, modifying and
+    inserting those does not already give the order of `new` (sections were
+    moved), the delta also carries `order`, the ids of `new` in order, so
+    applying it always reproduces the new snapshot exactly.
+    """
+    if old and isinstance(old[0], dict):
+        old = summarize(old)
+    old_digests = {course_id: digest for course_id, _, digest in old}
+    new_ids = []
+    added = []
+    modified = []
+    for index, course in enumerate(new):
+        new_ids.append(course['id'])
+        digest = old_digests.get(course['id'])
+        if digest is None:
+            added.append({'index': index, 'course': course})
+        elif digest != row_digest(course):
+            modified.append(course)
+    kept = set(new_ids)
+    removed = [course_id for course_id, _, _ in old if course_id not in kept]
+    delta = {'added': added, 'removed': removed, 'modified': modified}
+
+    removed_ids = set(removed)
+    ids = [course_id for course_id, _, _ in old if course_id not in removed_ids]
+    for entry in added:
+        ids.insert(entry['index'], entry['course']['id'])
+    if ids != new_ids:
+        delta['order'] = new_ids
+    return delta
+
+
+def is_empty(delta):
+    return not (delta['added'] or delta['removed'] or delta['modified'] or delta.get('order'))
+
+
+def apply_delta(snapshot, delta):
+    """Return a new snapshot with one delta applied. The input list is not modified."""
+    removed = set(delta['removed'])
+    modified = {course['id']: course for course in delta['modified']}
+    result = [modified.get(course['id'], course) for course in snapshot if course['id'] not in removed]
+    for entry in sorted(delta['added'], key=lambda entry: entry['index']):
+        result.insert(entry['index'], entry['course'])
+    if delta.get('order'):
+        by_id = {course['id']: course for course in result}
+        result = [by_id[course_id] for course_id in delta['order']]
+    return result
+
+
+def apply_deltas(snapshot, deltas):
+    """Apply a chain of deltas, oldest first."""
+    for delta in deltas:
+        snapshot = apply_delta(snapshot, delta)
+    return snapshot
+
+
+def load_changelog(path=CHANGELOG_PATH):
+    """Load the changelog, or None if there is none yet or it is truncated or corrupt."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            changelog = json.load(f)
+        if not all(isinstance(changelog.get(key), int) for key in ('version', 'baseVersion')):
+            raise ValueError("missing version fields")
+        if not isinstance(changelog.get('entries'), list):
+            raise ValueError("missing entries")
+    except (OSError, ValueError, AttributeError) as e:
+        log.warning(f"Ignoring unreadable changelog {path}: {e}")
+        return None
+    return changelog
+
+
+def current_version(path=CHANGELOG_PATH):
+    """Version of the latest snapshot in the changelog, or None."""
+    changelog = load_changelog(path)
+    return changelog['version'] if changelog else None
+
+
+def published_version(path=SEMESTER_INFO_PATH):
+    """The changelogVersion stamped into semester-info.json, or 0."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            version = json.load(f).get('changelogVersion')
+    except (OSError, ValueError, AttributeError):
+        return 0
+    return version if isinstance(version, int) else 0
+
+
+def deltas_since(changelog, version):
+    """
+    Entries that take a client from `version` to the latest version.
+
+    Returns None when `version` is older than the retained history (or from
+    another period), in which case the client must reload the full snapshot.
+    """
+    if version == changelog['version']:
+        return []
+    if version < changelog['baseVersion'] or version > changelog['version']:
+        return None
+    return [entry for entry in changelog['entries'] if entry['version'] > version]
+
+
+def record_snapshot(old, new, period, path=CHANGELOG_PATH, timestamp=None, max_entries=MAX_ENTRIES,
+                    last_version=0):
+    """
+    Append the delta between two snapshots to the changelog and return the new version.
+
+    `old` is the previous rows or their summarize().
+
+    A period change (or a missing or unreadable changelog) starts a fresh
+    history whose base is the new snapshot, since a cross-period delta is the
+    whole file. Its version follows both the old changelog and `last_version`,
+    the last version clients were given, so none of them mistakes the new
+    history for the one it holds.
+    """
+    timestamp = timestamp if timestamp is not None else int(time.time() * 1000)
+    changelog = load_changelog(path)
+    if changelog is None or changelog.get('period') != period:
+        version = max(changelog['version'] if changelog else 0, last_version or 0) + 1
+        changelog = {'period': period, 'version': version, 'baseVersion': version, 'entries': []}
+    else:
+        delta = compute_delta(old, new)
+        if is_empty(delta):
+            return changelog['version']
+        changelog['version'] += 1
+        delta['version'] = changelog['version']
+        delta['timestamp'] = timestamp
+        changelog['entries'].append(delta)
+        if len(changelog['entries']) > max_entries:
+            changelog['entries'] = changelog['entries'][-max_entries:]
+            changelog['baseVersion'] = changelog['entries'][0]['version'] - 1
+    changelog['updated'] = timestamp
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(changelog, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return changelog['version']
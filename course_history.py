@@ -0,0 +1,224 @@
+"""
+SQLite history of course offerings across scraper runs.
+
+Every run gets a row in `runs`. `versions` stores only the sections that were
+added, modified or removed in that run, so the database grows with the amount
+of change rather than with the number of runs. `current` holds the latest
+version of every live section and is what new snapshots are compared against.
+
+    python course_history.py changes "CSCI 21" A --fields room instructor
+    python course_history.py added --days 7 [--dept DISCS]
+    python course_history.py runs
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+HISTORY_PATH = os.path.join('.cache', 'course-history.sqlite3')
+FIELDS = ('courseTitle', 'units', 'time', 'room', 'instructor', 'remarks')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    period TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    row_count INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    modified INTEGER NOT NULL,
+    removed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    run_at REAL NOT NULL,
+    period TEXT NOT NULL,
+    course_id TEXT NOT NULL,
+    dept_code TEXT NOT NULL,
+    cat_no TEXT NOT NULL,
+    section TEXT NOT NULL,
+    change TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (course_id, run_id)
+);
+CREATE TABLE IF NOT EXISTS current (
+    period TEXT NOT NULL,
+    course_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (period, course_id)
+);
+CREATE INDEX IF NOT EXISTS runs_period_time ON runs (period, run_at);
+CREATE INDEX IF NOT EXISTS versions_period_dept ON versions (period, dept_code, run_at);
+CREATE INDEX IF NOT EXISTS versions_section ON versions (cat_no, section, period, run_at);
+CREATE INDEX IF NOT EXISTS versions_change_time ON versions (change, run_at);
+"""
+
+
+def _encode(row):
+    return json.dumps(row, sort_keys=True, separators=(',', ':'))
+
+
+class CourseHistory:
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def has_period(self, applicable_period):
+        """True if sections of the period have been recorded before."""
+        return self.db.execute(
+            "SELECT 1 FROM current WHERE period = ? LIMIT 1", (applicable_period,)
+        ).fetchone() is not None
+
+    def record_run(self, applicable_period, rows, run_at=None):
+        """Store one scraped snapshot. Returns the run summary with added/modified/removed counts.
+
+        rows are read once and written as they come, so they can be streamed from courses.json.
+        """
+        run_at = run_at if run_at is not None else time.time()
+        current = dict(self.db.execute(
+            "SELECT course_id, data FROM current WHERE period = ?", (applicable_period,)
+        ))
+        counts = {change: 0 for change in ('added', 'modified', 'removed')}
+
+        def store(run_id, change, row, data):
+            counts[change] += 1
+            self.db.execute(
+                "INSERT INTO versions (run_id, run_at, period, course_id, dept_code, cat_no, section, change, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, run_at, applicable_period, row['id'], row['deptCode'], row['catNo'], row['section'],
+                 change, data),
+            )
+            if change == 'removed':
+                self.db.execute("DELETE FROM current WHERE period = ? AND course_id = ?",
+                                (applicable_period, row['id']))
+            else:
+                self.db.execute("INSERT OR REPLACE INTO current (period, course_id, data) VALUES (?, ?, ?)",
+                                (applicable_period, row['id'], data))
+
+        with self.db:
+            run_id = self.db.execute(
+                "INSERT INTO runs (period, run_at, row_count, added, modified, removed) VALUES (?, ?, 0, 0, 0, 0)",
+                (applicable_period, run_at),
+            ).lastrowid
+            seen = set()
+            for row in rows:
+                data = _encode(row)
+                seen.add(row['id'])
+                previous = current.get(row['id'])
+                if previous is None:
+                    store(run_id, 'added', row, data)
+                elif previous != data:
+                    store(run_id, 'modified', row, data)
+            for course_id in current.keys() - seen:
+                store(run_id, 'removed', json.loads(current[course_id]), current[course_id])
+            self.db.execute("UPDATE runs SET row_count = ?, added = ?, modified = ?, removed = ? WHERE run_id = ?",
+                            (len(seen), counts['added'], counts['modified'], counts['removed'], run_id))
+        return {'runId': run_id, 'period': applicable_period, 'runAt': run_at, **counts}
+
+    def record_unchanged(self, applicable_period, row_count, run_at=None):
+        """Log a run whose snapshot was byte-identical to the previous one, without comparing rows."""
+        run_at = run_at if run_at is not None else time.time()
+        with self.db:
+            run_id = self.db.execute(
+                "INSERT INTO runs (period, run_at, row_count, added, modified, removed) VALUES (?, ?, ?, 0, 0, 0)",
+                (applicable_period, run_at, row_count),
+            ).lastrowid
+        return {'runId': run_id, 'period': applicable_period, 'runAt': run_at, 'added': 0, 'modified': 0, 'removed': 0}
+
+    def runs(self, applicable_period=None, limit=20):
+        query = "SELECT run_id, period, run_at, row_count, added, modified, removed FROM runs"
+        params = ()
+        if applicable_period:
+            query += " WHERE period = ?"
+            params = (applicable_period,)
+        query += " ORDER BY run_at DESC LIMIT ?"
+        keys = ('runId', 'period', 'runAt', 'rows', 'added', 'modified', 'removed')
+        return [dict(zip(keys, values)) for values in self.db.execute(query, params + (limit,))]
+
+    def versions(self, cat_no, section, applicable_period=None):
+        """Every stored version of a section, oldest first, as (runAt, change, row)."""
+        query = "SELECT run_at, change, data FROM versions WHERE cat_no = ? AND section = ?"
+        params = [cat_no, section]
+        if applicable_period:
+            query += " AND period = ?"
+            params.append(applicable_period)
+        return [(run_at, change, json.loads(data)) for run_at, change, data in
+                self.db.execute(query + " ORDER BY run_at", params)]
+
+    def field_changes(self, cat_no, section, fields=FIELDS, applicable_period=None):
+        """When and how the given fields of a section changed, e.g. its room or instructor."""
+        changes = []
+        previous = {}
+        for run_at, change, row in self.versions(cat_no, section, applicable_period):
+            key = row['id']
+            if change == 'modified' and key in previous:
+                for field in fields:
+                    if previous[key].get(field) != row.get(field):
+                        changes.append({'runAt': run_at, 'id': key, 'field': field,
+                                        'old': previous[key].get(field), 'new': row.get(field)})
+            previous[key] = row
+        return changes
+
+    def _since(self, change, since, applicable_period=None, dept_code=None):
+        query = "SELECT run_at, data FROM versions WHERE change = ? AND run_at >= ?"
+        params = [change, since]
+        if applicable_period:
+            query += " AND period = ?"
+            params.append(applicable_period)
+        if dept_code:
+            query += " AND dept_code = ?"
+            params.append(dept_code)
+        return [dict(json.loads(data), changedAt=run_at) for run_at, data in
+                self.db.execute(query + " ORDER BY run_at", params)]
+
+    def sections_added_since(self, since, applicable_period=None, dept_code=None):
+        """Sections that first appeared at or after `since` (epoch seconds)."""
+        return self._since('added', since, applicable_period, dept_code)
+
+    def sections_removed_since(self, since, applicable_period=None, dept_code=None):
+        return self._since('removed', since, applicable_period, dept_code)
+
+
+def _format_time(run_at):
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(run_at))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the course offering history.")
+    parser.add_argument('--db', default=os.environ.get('COURSE_HISTORY_DB') or HISTORY_PATH)
+    parser.add_argument('--period')
+    commands = parser.add_subparsers(dest='command', required=True)
+    changes = commands.add_parser('changes', help="field changes of one section")
+    changes.add_argument('cat_no')
+    changes.add_argument('section')
+    changes.add_argument('--fields', nargs='+', default=list(FIELDS))
+    added = commands.add_parser('added', help="sections added recently")
+    added.add_argument('--days', type=float, default=7)
+    added.add_argument('--dept')
+    commands.add_parser('runs', help="recent runs")
+    args = parser.parse_args()
+
+    history = CourseHistory(args.db)
+    if args.command == 'changes':
+        for change in history.field_changes(args.cat_no, args.section, args.fields, args.period):
+            print(f"{_format_time(change['runAt'])}  {change['field']}: {change['old']!r} -> {change['new']!r}")
+    elif args.command == 'added':
+        for row in history.sections_added_since(time.time() - args.days * 86400, args.period, args.dept):
+            print(f"{_format_time(row['changedAt'])}  {row['deptCode']:<8} {row['catNo']:<12} {row['section']:<6} {row['courseTitle']}")
+    else:
+        for run in history.runs(args.period):
+            print(f"{_format_time(run['runAt'])}  {run['period']}  {run['rows']} rows, "
+                  f"+{run['added']} ~{run['modified']} -{run['removed']}")
+    history.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Prebuilt lookup indexes over courses.json.
+
+build_indexes writes, under data/index/:
+
+    index.json        manifest: deptCode -> shard file and row count
+    dept/<slug>.json  one shard per department, rows in snapshot order
+    catno.json        catNo -> [[deptCode, offset], ...]
+    ids.json          id -> [deptCode, offset]
+
+CourseIndex answers deptCode, catNo and id lookups by loading only the
+shards a query touches, so a lookup costs O(1) plus the size of the answer.
+"""
+import os
+import re
+import json
+
+import course_deltas
+
+INDEX_DIR = os.path.join('data', 'index')
+
+
+def _slug(dept_code):
+    return re.sub(r'[^a-z0-9]+', '-', dept_code.lower()).strip('-') or 'dept'
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def build_indexes(rows, out_dir=INDEX_DIR):
+    """
+    Write the shards, catNo map, id map and manifest for a snapshot. Returns the manifest.
+
+    Every file is replaced atomically and the manifest is written last, so a
+    crash mid-run never leaves a half-written shard or a manifest entry
+    without its shard. Shards of departments that are gone are removed only
+    after the new manifest is in place. rows are read once, a department at a
+    time, so they can be streamed from courses.json.
+    """
+    shard_dir = os.path.join(out_dir, 'dept')
+    os.makedirs(shard_dir, exist_ok=True)
+
+    departments = {}
+    catnos = {}
+    ids = {}
+    used = set()
+    count = 0
+    for dept_code, shard in course_deltas.department_runs(rows):
+        slug = _slug(dept_code)
+        while slug in used:
+            slug += '-'
+        used.add(slug)
+        filename = f"dept/{slug}.json"
+        _write_json(os.path.join(out_dir, filename), shard)
+        departments[dept_code] = {'file': filename, 'count': len(shard)}
+        count += len(shard)
+        for offset, row in enumerate(shard):
+            catnos.setdefault(row['catNo'], []).append([dept_code, offset])
+            ids[row['id']] = [dept_code, offset]
+
+    _write_json(os.path.join(out_dir, 'catno.json'), catnos)
+    _write_json(os.path.join(out_dir, 'ids.json'), ids)
+    manifest = {'count': count, 'departments': departments}
+    _write_json(os.path.join(out_dir, 'index.json'), manifest)
+
+    current = {os.path.basename(entry['file']) for entry in departments.values()}
+    for filename in os.listdir(shard_dir):
+        if filename.endswith(('.json', '.tmp')) and filename not in current:
+            os.remove(os.path.join(shard_dir, filename))
+    return manifest
+
+
+class CourseIndex:
+    """Lazy reader for the artifacts written by build_indexes."""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self._manifest = None
+        self._catnos = None
+        self._ids = None
+        self._shards = {}
+
+    def _load(self, filename):
+        with open(os.path.join(self.index_dir, filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = self._load('index.json')
+        return self._manifest
+
+    def departments(self):
+        return list(self.manifest['departments'])
+
+    def by_dept(self, dept_code):
+        """All sections of a department, loading only that shard."""
+        entry = self.manifest['departments'].get(dept_code)
+        if entry is None:
+            return []
+        if dept_code not in self._shards:
+            self._shards[dept_code] = self._load(entry['file'])
+        return self._shards[dept_code]
+
+    def _at(self, location):
+        dept_code, offset = location
+        return self.by_dept(dept_code)[offset]
+
+    def by_catno(self, cat_no, dept_code=None):
+        """All sections of a catalogue number, optionally limited to one department."""
+        if self._catnos is None:
+            self._catnos = self._load('catno.json')
+        locations = self._catnos.get(cat_no, [])
+        if dept_code is not None:
+            locations = [location for location in locations if location[0] == dept_code]
+        return [self._at(location) for location in locations]
+
+    def by_id(self, course_id):
+        if self._ids is None:
+            self._ids = self._load('ids.json')
+        location = self._ids.get(course_id)
+        return self._at(location) if location else None
+
+    def query(self, dept_code=None, cat_no=None):
+        """Same filtering as /api/offerings: deptCode and/or catNo, all rows when neither is given."""
+        if cat_no:
+            return self.by_catno(cat_no, dept_code)
+        if dept_code:
+            return self.by_dept(dept_code)
+        return [row for code in self.departments() for row in self.by_dept(code)]
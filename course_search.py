@@ -0,0 +1,267 @@
+"""
+Search index over courses.json: catNo, courseTitle, instructor and room.
+
+build_index writes data/search-index.json:
+
+    ids       section ids in snapshot order; a section's position is its doc number
+    vocab     every token, sorted, so prefixes are a bisect away
+    postings  per vocab token, ints doc * 16 + field mask, ascending
+
+Text is lowercased and split on anything but letters, digits and dots, so
+"MATH 31.1" gives "math" and "31.1". A catNo also gets its spaceless form
+("csci21"). The trigram index used for infix matches is derived from vocab
+when a query first needs it, so it costs nothing on disk.
+
+Every query term must match a token of the section exactly, as a prefix, or
+(3+ characters) anywhere inside it. Sections are ranked by the sum over terms
+of the best match kind times field weight, then by snapshot order.
+
+    python course_search.py "cs 21" "guzman" [--limit 10]
+    python course_search.py --bench
+"""
+import os
+import re
+import sys
+import json
+import time
+import bisect
+import argparse
+
+SEARCH_PATH = os.path.join('data', 'search-index.json')
+VERSION = 1
+
+FIELDS = ('catNo', 'courseTitle', 'instructor', 'room')
+FIELD_WEIGHTS = (8.0, 4.0, 3.0, 2.0)
+EXACT, PREFIX, INFIX = 1.0, 0.6, 0.3
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+(?:\.[a-z0-9]+)*')
+
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def field_tokens(row):
+    """(field index, token) pairs of a row."""
+    cat_tokens = tokenize(row.get('catNo', ''))
+    yield from ((0, token) for token in cat_tokens)
+    if len(cat_tokens) > 1:
+        yield 0, ''.join(cat_tokens)
+    yield from ((1, token) for token in tokenize(row.get('courseTitle', '')))
+    yield from ((2, token) for token in tokenize(row.get('instructor', '')))
+    yield from ((3, token) for token in tokenize(row.get('room', '')))
+
+
+def build(rows):
+    """The index document for the rows of a snapshot, read in one pass."""
+    masks = {}
+    ids = []
+    for doc, row in enumerate(rows):
+        ids.append(row['id'])
+        for field, token in field_tokens(row):
+            docs = masks.setdefault(token, {})
+            docs[doc] = docs.get(doc, 0) | (1 << field)
+    vocab = sorted(masks)
+    return {
+        'version': VERSION,
+        'fields': list(FIELDS),
+        'ids': ids,
+        'vocab': vocab,
+        'postings': [[doc * 16 + mask for doc, mask in masks[token].items()] for token in vocab],
+    }
+
+
+def build_index(rows, path=SEARCH_PATH):
+    """Write the index for a snapshot. Returns its size in bytes."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(build(rows), f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def _trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class CourseSearch:
+    def __init__(self, index):
+        if index.get('version') != VERSION:
+            raise ValueError(f"Search index version {index.get('version')} is not {VERSION}; rebuild it")
+        self.ids = index['ids']
+        self.vocab = index['vocab']
+        self.postings = index['postings']
+        self.positions = {token: i for i, token in enumerate(self.vocab)}
+        self._trigram_index = None
+
+    @classmethod
+    def load(cls, path=SEARCH_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(build(rows))
+
+    @property
+    def trigram_index(self):
+        if self._trigram_index is None:
+            trigrams = {}
+            for i, token in enumerate(self.vocab):
+                for trigram in _trigrams(token):
+                    trigrams.setdefault(trigram, []).append(i)
+            self._trigram_index = trigrams
+        return self._trigram_index
+
+    def _matching_tokens(self, term):
+        """Vocab positions matching a term, with the match weight of each."""
+        matches = {}
+        start = bisect.bisect_left(self.vocab, term)
+        for i in range(start, len(self.vocab)):
+            if not self.vocab[i].startswith(term):
+                break
+            matches[i] = EXACT if self.vocab[i] == term else PREFIX
+        if len(term) >= 3:
+            candidates = None
+            for trigram in _trigrams(term):
+                found = set(self.trigram_index.get(trigram, ()))
+                candidates = found if candidates is None else candidates & found
+                if not candidates:
+                    break
+            for i in candidates or ():
+                if i not in matches and term in self.vocab[i]:
+                    matches[i] = INFIX
+        return matches
+
+    def _term_scores(self, term):
+        scores = {}
+        for i, weight in self._matching_tokens(term).items():
+            for posting in self.postings[i]:
+                doc, mask = posting >> 4, posting & 15
+                score = weight * max(FIELD_WEIGHTS[field] for field in range(len(FIELDS)) if mask & (1 << field))
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def scored(self, query, limit=None):
+        """[(section id, score)] for sections matching every term, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        # Rarest term first, so the running intersection stays small
+        per_term = sorted((self._term_scores(term) for term in terms), key=len)
+        totals = dict(per_term[0])
+        for scores in per_term[1:]:
+            totals = {doc: total + scores[doc] for doc, total in totals.items() if doc in scores}
+            if not totals:
+                return []
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self.ids[doc], score) for doc, score in ranked]
+
+    def search(self, query, limit=None):
+        """Ranked section ids for a query such as 'cs 21', 'guzman' or 'intro prog'."""
+        return [course_id for course_id, _ in self.scored(query, limit)]
+
+
+def linear_scan(rows, query):
+    """The substring scan the index replaces: every term somewhere in the normalized fields."""
+    terms = tokenize(query)
+    matches = []
+    for row in rows:
+        haystack = normalize(' '.join(row.get(field, '') for field in FIELDS))
+        if all(term in haystack for term in terms):
+            matches.append(row['id'])
+    return matches
+
+
+BENCH_QUERIES = ('cs 21', 'csci 21', 'math 31.1', 'intro', 'program', 'guzman', 'de la', 'ctc 10', 'theology',
+                 'olog', 'philo 11', 'tba', 'data struct', 'nstp', 'fil 11', 'lab')
+
+
+def benchmark(rows, queries=BENCH_QUERIES, repeat=20):
+    """Build time, size and per-query latency of the index against linear_scan."""
+    start = time.perf_counter()
+    index = build(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+    encoded = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    start = time.perf_counter()
+    search = CourseSearch(json.loads(encoded))
+    search.trigram_index
+    load_ms = (time.perf_counter() - start) * 1000
+
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            found = search.search(query)
+        index_ms = (time.perf_counter() - start) * 1000 / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            scanned = linear_scan(rows, query)
+        scan_ms = (time.perf_counter() - start) * 1000 / repeat
+        # The scan also matches across token boundaries, so report how much of it the index covers
+        covered = len(set(scanned) & set(found)) / len(scanned) if scanned else 1.0
+        results.append({'query': query, 'indexMs': index_ms, 'scanMs': scan_ms,
+                        'indexHits': len(found), 'scanHits': len(scanned), 'scanCovered': covered})
+    return {
+        'rows': len(rows),
+        'buildMs': build_ms,
+        'loadMs': load_ms,
+        'indexBytes': len(encoded),
+        'snapshotBytes': len(json.dumps(rows, indent=4).encode('utf-8')),
+        'vocab': len(index['vocab']),
+        'queries': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search courses by catNo, title, instructor or room.")
+    parser.add_argument('queries', nargs='*')
+    parser.add_argument('--index', default=SEARCH_PATH)
+    parser.add_argument('--courses', default=os.path.join('data', 'courses.json'))
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--build', action='store_true', help="(re)build the index from --courses first")
+    parser.add_argument('--bench', action='store_true', help="compare the index with a linear scan")
+    args = parser.parse_args()
+
+    if args.bench or args.build or not os.path.exists(args.index):
+        with open(args.courses, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    if args.bench:
+        report = benchmark(rows)
+        print(f"{report['rows']} rows, vocab {report['vocab']}, index {report['indexBytes'] / 1e3:.0f} kB "
+              f"(snapshot {report['snapshotBytes'] / 1e3:.0f} kB), build {report['buildMs']:.1f} ms, "
+              f"load {report['loadMs']:.1f} ms")
+        print(f"{'query':<14} {'index ms':>9} {'scan ms':>9} {'hits':>6} {'scan':>6} {'covered':>8}")
+        for result in report['queries']:
+            print(f"{result['query']:<14} {result['indexMs']:9.3f} {result['scanMs']:9.3f} "
+                  f"{result['indexHits']:6} {result['scanHits']:6} {result['scanCovered']:8.0%}")
+        return 0
+    if args.build or not os.path.exists(args.index):
+        print(f"Wrote {args.index} ({build_index(rows, args.index)} bytes)")
+    search = CourseSearch.load(args.index)
+    by_id = None
+    for query in args.queries:
+        results = search.scored(query, args.limit)
+        if by_id is None:
+            by_id = {}
+            if os.path.exists(args.courses):
+                with open(args.courses, 'r', encoding='utf-8') as f:
+                    by_id = {row['id']: row for row in json.load(f)}
+        print(f"{query}:")
+        for course_id, score in results:
+            row = by_id.get(course_id)
+            label = f"{row['catNo']:<14} {row['section']:<6} {row['courseTitle']}" if row else course_id
+            print(f"  {score:5.2f}  {label}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""
+Text helpers shared by the scraper and the indexes derived from its rows.
+
+Standard library only, so room_index, slot_watcher and the other derived
+modules can use them without importing aisis_scraper and its HTTP and parser
+dependencies.
+"""
+
+
+def clean_text(text):
+    """Trim a cell and collapse every whitespace run (newlines included) to one space."""
+    return ' '.join(text.split())
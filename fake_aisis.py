@@ -0,0 +1,292 @@
+"""
+Local stand-in for the AISIS endpoints used by aisis_scraper.py.
+
+Serves login.do, J_VMCS.do and J_VCSC.do with either recorded result pages
+(<pages_dir>/<deptCode>.html) or synthetic pages, with configurable latency,
+error rate, truncated result pages and session expiry. Point the scraper at it with AISIS_BASE_URL.
+
+    python fake_aisis.py --port 8080 --scale 10 --latency 0.2
+"""
+import os
+import sys
+import time
+import random
+import secrets
+import argparse
+import threading
+from html import escape
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_ROWS = 100
+
+_TITLES = [
+    "INTRODUCTION TO", "FOUNDATIONS OF", "ADVANCED", "SEMINAR IN", "TOPICS IN",
+    "PRINCIPLES OF", "METHODS IN", "THEORIES OF", "PRACTICUM IN", "READINGS IN",
+]
+_SUBJECTS = [
+    "COMPUTING", "PHILOSOPHY", "THEOLOGY", "ECONOMICS", "LITERATURE", "BIOLOGY",
+    "CHEMISTRY", "HISTORY", "MANAGEMENT", "PSYCHOLOGY", "STATISTICS", "DESIGN",
+]
+_TIMES = [
+    "M-TH 0800-0930", "M-TH 0930-1100", "M-TH 1100-1230", "M-TH 1400-1530",
+    "T-F 0800-0930", "T-F 1100-1230", "T-F 1530-1700", "W 1100-1400",
+    "W 1400-1700", "SAT 0800-1100", "M-TH 0930-1100; SAT 0800-1100",
+    "TBA", "TUTORIAL", "D 0700-0800",
+]
+_ROOMS = ["SEC-A 210", "CTC 107", "BEL 201", "F-113", "C-109", "LST", "TBA", "INNOVATION 202"]
+_SURNAMES = ["SANTOS", "REYES", "CRUZ", "BAUTISTA", "GARCIA", "MENDOZA", "TAN", "LIM", "DELA CRUZ"]
+_GIVEN = ["Maria", "Jose", "Ana", "Juan", "Paolo", "Bea", "Carlo", "Isabel"]
+
+
+def synthetic_rows(dept_code, rows, seed=0):
+    """Return `rows` lists of 14 cell strings shaped like an AISIS result table."""
+    rng = random.Random(f"{seed}:{dept_code}")
+    prefix = ''.join(ch for ch in dept_code if ch.isalpha())[:4] or "GEN"
+    result = []
+    for i in range(rows):
+        cat_no = f"{prefix} {100 + i // 4}.{i % 4:02d}"
+        instructors = ', '.join(
+            f"{rng.choice(_SURNAMES)}, {rng.choice(_GIVEN)}" for _ in range(rng.choice([1, 1, 1, 2]))
+        )
+        result.append([
+            cat_no,
+            f"{rng.choice('ABCDKLNQRSTUVWXYZ')}{rng.choice(['', '1', '2', 'A'])}",
+            f"{rng.choice(_TITLES)} {rng.choice(_SUBJECTS)}",
+            rng.choice(["3", "3", "3", "0", "1", "6"]),
+            f"{rng.choice(_TIMES)}{rng.choice(['', '(FULLY ONSITE)', '(FULLY ONLINE)'])}~",
+            rng.choice(_ROOMS),
+            instructors,
+            str(rng.choice([20, 25, 30, 35, 40])),
+            "ENG",
+            rng.choice(["U", "G"]),
+            str(rng.randint(0, 20)),
+            rng.choice(["-", "-", "-", "For freshmen only", "Majors only"]),
+            "N",
+            "-",
+        ])
+    return result
+
+
+def render_results_page(dept_code, rows):
+    """Render cell rows into a J_VCSC.do result page."""
+    body = []
+    for cells in rows:
+        tds = ''.join(
+            f'<td class="text02" align="center" bgcolor="#FFFFFF">\n\t\t{escape(cell)}\n\t</td>'
+            for cell in cells
+        )
+        body.append(f"<tr>{tds}</tr>")
+    return (
+        "<html><head><title>AISIS Online</title></head><body>"
+        f'<p class="header06">Class Schedule - {escape(dept_code)}</p>'
+        '<table width="100%" border="0"><tr><td class="text04">Subject Code</td></tr>'
+        + '\n'.join(body)
+        + "</table></body></html>"
+    )
+
+
+def generate_department_page(dept_code, scale=1, seed=0):
+    """Synthetic result page with BASE_ROWS * scale sections."""
+    return render_results_page(dept_code, synthetic_rows(dept_code, int(BASE_ROWS * scale), seed))
+
+
+LOGIN_PAGE = "<html><body><form action='login.do'><input type='submit' value='Sign in'></form></body></html>"
+
+
+class FakeAISIS(ThreadingHTTPServer):
+    """Threaded HTTP server that answers like AISIS."""
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), pages_dir=None, scale=1, latency=0.0,
+                 jitter=0.0, error_rate=0.0, expire_after=0, seed=0, truncate_rate=0.0):
+        super().__init__(address, _Handler)
+        self.pages_dir = pages_dir
+        self.scale = scale
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.expire_after = expire_after
+        self.seed = seed
+        self.sessions = {}
+        self.pages = {}
+        self.requests = 0
+        self.errors = 0
+        self.truncated = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_for(self, dept_code):
+        """Return the (cached) result page for a department."""
+        with self.lock:
+            if dept_code not in self.pages:
+                path = os.path.join(self.pages_dir, f"{dept_code}.html") if self.pages_dir else None
+                if path and os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        self.pages[dept_code] = f.read()
+                else:
+                    self.pages[dept_code] = generate_department_page(dept_code, self.scale, self.seed)
+            return self.pages[dept_code]
+
+    def start(self):
+        """Serve on a background thread and return self."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _session(self):
+        for part in self.headers.get('Cookie', '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == 'JSESSIONID':
+                return value
+        return None
+
+    def _send(self, status, body, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server.lock:
+            self.server.bytes_sent += len(data)
+
+    def _send_truncated(self, body):
+        """Announce the full Content-Length, send half the body and drop the connection."""
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data[:len(data) // 2])
+        self.close_connection = True
+        with self.server.lock:
+            self.server.truncated += 1
+            self.server.bytes_sent += len(data) // 2
+
+    def _redirect_to_login(self):
+        self._send(302, "", {'Location': '/j_aisis/displayLogin.do'})
+
+    def _simulate_network(self):
+        """Apply latency and injected failures. Returns True if the request was answered with an error."""
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            delay = server.latency + server.rng.uniform(0, server.jitter)
+            failed = server.rng.random() < server.error_rate
+            if failed:
+                server.errors += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self._send(503, "<html><body>Service Unavailable</body></html>")
+        return failed
+
+    def _valid_session(self, count=False):
+        server = self.server
+        token = self._session()
+        with server.lock:
+            if token not in server.sessions:
+                return False
+            if count:
+                server.sessions[token] += 1
+                if server.expire_after and server.sessions[token] > server.expire_after:
+                    del server.sessions[token]
+                    return False
+            return True
+
+    def _read_form(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        return {key: values[0].strip("'") for key, values in form.items()}
+
+    def do_GET(self):
+        if self._simulate_network():
+            return
+        if self.path.startswith('/j_aisis/J_VMCS.do'):
+            if not self._valid_session():
+                return self._redirect_to_login()
+            return self._send(200, "<html><body>MY INDIVIDUAL PROGRAM OF STUDY</body></html>")
+        if self.path.startswith('/j_aisis/J_VCSC.do'):
+            if not self._valid_session():
+                return self._redirect_to_login()
+            return self._send(200, "<html><body>Class Schedule</body></html>")
+        if self.path.startswith('/j_aisis/displayLogin.do'):
+            return self._send(200, LOGIN_PAGE)
+        self._send(404, "<html><body>Not Found</body></html>")
+
+    def do_POST(self):
+        form = self._read_form()
+        if self._simulate_network():
+            return
+        if self.path.startswith('/j_aisis/login.do'):
+            if not form.get('userName') or not form.get('password'):
+                return self._send(200, LOGIN_PAGE)
+            token = secrets.token_hex(16)
+            with self.server.lock:
+                self.server.sessions[token] = 0
+            return self._send(
+                200,
+                f"<html><body>User Identified As {escape(form['userName'])}</body></html>",
+                {'Set-Cookie': f"JSESSIONID={token}; Path=/"},
+            )
+        if self.path.startswith('/j_aisis/J_VCSC.do'):
+            if not self._valid_session(count=True):
+                return self._redirect_to_login()
+            page = self.server.page_for(form.get('deptCode', ''))
+            with self.server.lock:
+                truncate = self.server.rng.random() < self.server.truncate_rate
+            if truncate:
+                return self._send_truncated(page)
+            return self._send(200, page)
+        self._send(404, "<html><body>Not Found</body></html>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake AISIS for offline scraper runs.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pages', help="directory of recorded <deptCode>.html result pages")
+    parser.add_argument('--scale', type=float, default=1, help=f"synthetic rows per department = {BASE_ROWS} * scale")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--expire-after', type=int, default=0, help="expire a session after this many result pages")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help="fraction of result pages cut off halfway through the body")
+    args = parser.parse_args()
+
+    server = FakeAISIS((args.host, args.port), args.pages, args.scale, args.latency,
+                       args.jitter, args.error_rate, args.expire_after, args.seed,
+                       args.truncate_rate)
+    print(f"Fake AISIS listening on {server.base_url}")
+    print(f"Run the scraper with AISIS_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
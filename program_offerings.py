@@ -0,0 +1,318 @@
+"""
+Precomputed join of programs of study against the current offerings.
+
+data/programs.json maps a program id to [{program_info, years: [{year,
+semesters: [{name, courses: [{catNo, ...}]}]}]}]. build_join writes
+data/program-offerings.json:
+
+    programs   id -> years -> semesters -> curriculum catNos, in curriculum order
+    offerings  curriculum catNo -> deptCode -> matching section ids
+
+so a program view is a keyed lookup (lookup()) instead of filtering every
+offering against every curriculum entry. Matching follows the curriculum
+filter in components/ProgramOfferingsContent.js, including its NatSc, FLC,
+NSTP, PHILO, ISCS 30, IE and PE rules.
+
+Offerings are kept per department, and the document stores a digest of
+every department's rows (departments: deptCode -> digest). A rebuild
+re-matches only the departments whose digest differs from the stored one;
+a new programs.json or period rebuilds everything.
+
+data/programs.json is the file the app's /api/programs route serves. It is
+supplied with the deployment and is not kept in this repository, so until it
+is present, write_join logs that it skipped the join and the scraper publishes
+no program-offerings.json.
+
+    python program_offerings.py [--bench]
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+
+import course_deltas
+
+log = logging.getLogger('aisis_scraper')
+
+PROGRAMS_PATH = os.path.join('data', 'programs.json')
+JOIN_PATH = os.path.join('data', 'program-offerings.json')
+VERSION = 2
+
+_NATSC_RE = re.compile(r'^natsc\s*(.*)$', re.I)
+_FLC_RE = re.compile(r'^flc\s*(.*)$', re.I)
+_NSTP_RE = re.compile(r'^nstp\s*(\d*)', re.I)
+_PHILO_RE = re.compile(r'^philo\s*(\d*)', re.I)
+_ISCS30_RE = re.compile(r'^iscs\s*30\s*', re.I)
+_IE_RE = re.compile(r'^ie\s*(\d*)', re.I)
+_PE_RE = re.compile(r'^(pathfit|pepc|phyed|pe)\s*', re.I)
+_SPACE_RE = re.compile(r'\s+')
+
+NATSC_DEPTS = {"CHEM", "ENVI", "BIO", "PHYS"}
+FLC_DEPTS = {"JPN", "KRN", "CSP", "FRE", "GER", "ITA", "RUSS", "SPA"}
+
+
+def norm(value):
+    return _SPACE_RE.sub('', value.lower())
+
+
+def _parts(cat_no):
+    parts = _SPACE_RE.split(cat_no)
+    return parts[0].upper(), parts[1] if len(parts) > 1 else ''
+
+
+def _rule(cat):
+    """The matching predicate for a curriculum entry, or None if it matches by catNo alone."""
+    match = _NATSC_RE.match(cat)
+    if match:
+        number = _SPACE_RE.sub('', match.group(1).strip())
+        return lambda course: (lambda dept, num: bool(
+            dept in NATSC_DEPTS and num and number and _SPACE_RE.sub('', num) == number
+        ))(*_parts(course['catNo']))
+    match = _FLC_RE.match(cat)
+    if match:
+        number = _SPACE_RE.sub('', match.group(1).strip())
+        return lambda course: (lambda dept, num: bool(
+            dept in FLC_DEPTS and num and number and _SPACE_RE.sub('', num) == number
+        ))(*_parts(course['catNo']))
+    match = _NSTP_RE.match(cat)
+    if match:
+        number = match.group(1)
+        return lambda course: bool(number) and course['catNo'].upper().startswith(f"NSTP {number}")
+    match = _PHILO_RE.match(cat)
+    if match:
+        number = match.group(1)
+        return lambda course: bool(number) and course['catNo'].upper().startswith(f"PHILO {number}")
+    if _ISCS30_RE.match(cat):
+        return lambda course: (lambda dept, num: dept == "ISCS" and num.startswith("30"))(*_parts(course['catNo']))
+    match = _IE_RE.match(cat)
+    if match:
+        if match.group(1) == "1":
+            return lambda course: course['deptCode'] == "**IE**" and course['catNo'].upper().startswith("ENE")
+        return lambda course: course['deptCode'] == "**IE**"
+    if _PE_RE.match(cat):
+        return lambda course: course['deptCode'] == "PE"
+    return None
+
+
+def curriculum_matches(cat, course):
+    """True if an offering satisfies a curriculum entry, as in ProgramOfferingsContent."""
+    rule = _rule(cat)
+    return rule(course) if rule else norm(course['catNo']) == norm(cat)
+
+
+def curriculum_catnos(programs):
+    """Every distinct curriculum catNo across all programs."""
+    cats = set()
+    for entries in programs.values():
+        for entry in entries:
+            for year in entry.get('years', []):
+                for semester in year.get('semesters', []):
+                    cats.update(course['catNo'] for course in semester.get('courses', []) if course.get('catNo'))
+    return cats
+
+
+def curriculum_rules(cats):
+    """{cat: (predicate or None, normalized catNo)} for match_department."""
+    return {cat: (_rule(cat), norm(cat)) for cat in cats}
+
+
+def match_department(rules, rows):
+    """{cat: [section ids]} for the rows of one department, skipping cats with no match.
+
+    `rules` is curriculum_rules() of the curriculum catNos, built once per join.
+    """
+    by_norm = {}
+    for row in rows:
+        by_norm.setdefault(norm(row['catNo']), []).append(row['id'])
+    matches = {}
+    for cat, (rule, key) in rules.items():
+        if rule is None:
+            ids = by_norm.get(key)
+        else:
+            ids = [row['id'] for row in rows if rule(row)]
+        if ids:
+            matches[cat] = ids
+    return matches
+
+
+def _program_layout(programs):
+    layout = {}
+    for program_id, entries in programs.items():
+        entry = entries[0] if entries else {}
+        layout[program_id] = {
+            'program_info': entry.get('program_info'),
+            'years': [
+                {
+                    'year': year.get('year'),
+                    'semesters': [
+                        {
+                            'name': semester.get('name'),
+                            'catNos': [course['catNo'] for course in semester.get('courses', []) if course.get('catNo')],
+                        }
+                        for semester in year.get('semesters', [])
+                    ],
+                }
+                for year in entry.get('years', [])
+            ],
+        }
+    return layout
+
+
+def programs_digest(programs):
+    return hashlib.sha256(json.dumps(programs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def build_join(programs, rows, applicable_period=None, previous=None):
+    """
+    Build the join document.
+
+    With a previous document, departments whose stored digest matches their
+    current rows keep their offerings; the rest are re-matched. rows are read
+    once, a department at a time, so they can be streamed from courses.json.
+    """
+    digest = programs_digest(programs)
+    rules = curriculum_rules(curriculum_catnos(programs))
+    reuse = (previous is not None
+             and previous.get('version') == VERSION
+             and previous.get('programsDigest') == digest
+             and previous.get('period') == applicable_period)
+    stored_digests = previous.get('departments', {}) if reuse else {}
+
+    dept_digests = {}
+    current = set()
+    offerings = {}
+    depts_to_match = []
+    for dept, dept_rows in course_deltas.department_runs(rows):
+        dept_digests[dept] = course_deltas.department_digest(dept_rows)
+        if stored_digests.get(dept) == dept_digests[dept]:
+            current.add(dept)
+            continue
+        depts_to_match.append(dept)
+        for cat, ids in match_department(rules, dept_rows).items():
+            offerings.setdefault(cat, {})[dept] = ids
+
+    if current:
+        for cat, depts in previous['offerings'].items():
+            for dept, ids in depts.items():
+                if dept in current:
+                    offerings.setdefault(cat, {})[dept] = ids
+
+    # Keep departments in snapshot order so the flattened ids follow courses.json
+    dept_order = {dept: index for index, dept in enumerate(dept_digests)}
+    offerings = {
+        cat: dict(sorted(depts.items(), key=lambda item: dept_order[item[0]]))
+        for cat, depts in sorted(offerings.items())
+    }
+    return {
+        'version': VERSION,
+        'period': applicable_period,
+        'programsDigest': digest,
+        'departments': dept_digests,
+        'rematched': sorted(depts_to_match),
+        'programs': _program_layout(programs),
+        'offerings': offerings,
+    }
+
+
+def lookup(join, program_id, year_index, semester_index):
+    """{curriculum catNo: [section ids]} for one program semester."""
+    semester = join['programs'][program_id]['years'][year_index]['semesters'][semester_index]
+    return {
+        cat: [course_id for ids in join['offerings'].get(cat, {}).values() for course_id in ids]
+        for cat in semester['catNos']
+    }
+
+
+def load_join(path=JOIN_PATH):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring unreadable program join {path}: {e}")
+        return None
+
+
+def write_join(rows, applicable_period=None, programs_path=PROGRAMS_PATH, path=JOIN_PATH):
+    """Rebuild the join after a scrape, re-matching only changed departments. Returns the document, or None when there is no programs.json."""
+    if not os.path.exists(programs_path):
+        log.info(f"No {programs_path}, skipping the program join")
+        return None
+    with open(programs_path, 'r', encoding='utf-8') as f:
+        programs = json.load(f)
+    join = build_join(programs, rows, applicable_period, load_join(path))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({key: value for key, value in join.items() if key != 'rematched'}, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return join
+
+
+def _naive_semester(rows, cats):
+    return {cat: [row['id'] for row in rows if curriculum_matches(cat, row)] for cat in cats}
+
+
+def benchmark(programs, rows):
+    """Time a full build, a one-department rebuild and lookups against the per-view scan."""
+    results = {}
+    start = time.perf_counter()
+    join = build_join(programs, rows)
+    results['fullBuildMs'] = (time.perf_counter() - start) * 1000
+    dept = rows[0]['deptCode']
+    stale = dict(join, departments=dict(join['departments'], **{dept: ''}))
+    start = time.perf_counter()
+    build_join(programs, rows, previous=stale)
+    results['oneDeptRebuildMs'] = (time.perf_counter() - start) * 1000
+
+    views = [
+        (program_id, y, s)
+        for program_id, layout in join['programs'].items()
+        for y, year in enumerate(layout['years'])
+        for s, _ in enumerate(year['semesters'])
+    ]
+    start = time.perf_counter()
+    for view in views:
+        lookup(join, *view)
+    results['lookupMsPerView'] = (time.perf_counter() - start) * 1000 / max(1, len(views))
+    sample = views[:20]
+    start = time.perf_counter()
+    for program_id, y, s in sample:
+        cats = join['programs'][program_id]['years'][y]['semesters'][s]['catNos']
+        expected = _naive_semester(rows, cats)
+        if expected != lookup(join, program_id, y, s):
+            raise AssertionError(f"join differs from the scan for {program_id} year {y} semester {s}")
+    results['scanMsPerView'] = (time.perf_counter() - start) * 1000 / max(1, len(sample))
+    results['views'] = len(views)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the program x offerings join.")
+    parser.add_argument('--courses', default=os.path.join('data', 'courses.json'))
+    parser.add_argument('--programs', default=PROGRAMS_PATH)
+    parser.add_argument('--out', default=JOIN_PATH)
+    parser.add_argument('--bench', action='store_true', help="compare lookups with the per-view scan")
+    args = parser.parse_args()
+    if not os.path.exists(args.programs):
+        print(f"{args.programs} not found")
+        return 1
+    with open(args.courses, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    if args.bench:
+        with open(args.programs, 'r', encoding='utf-8') as f:
+            programs = json.load(f)
+        for key, value in benchmark(programs, rows).items():
+            print(f"{key:<18} {value:.3f}" if isinstance(value, float) else f"{key:<18} {value}")
+        return 0
+    join = write_join(rows, programs_path=args.programs, path=args.out)
+    print(f"Wrote {args.out}: {len(join['programs'])} programs, {len(join['offerings'])} matched catNos")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
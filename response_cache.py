@@ -0,0 +1,115 @@
+"""
+Persistent cache of parsed department pages keyed by (period, deptCode).
+
+Each entry keeps a fingerprint of the normalized response body together with
+the rows parsed from it, so the rows of an unchanged page are never built
+twice. Entries are evicted by age and by count when the cache is saved.
+"""
+import os
+import json
+import logging
+import time
+import hashlib
+import threading
+
+log = logging.getLogger('aisis_scraper')
+
+CACHE_PATH = os.path.join('.cache', 'aisis-responses.json')
+
+
+class Fingerprint:
+    """
+    Hash of a response body with whitespace runs collapsed, fed in chunks as it arrives.
+
+    `salt` scopes it to a parser/row format.
+    """
+
+    def __init__(self, salt=''):
+        self.digest = hashlib.sha256(salt.encode('utf-8'))
+        self.carry = ''
+        self.started = False
+
+    def _emit(self, tokens):
+        if not tokens:
+            return
+        if self.started:
+            self.digest.update(b' ')
+        self.digest.update(' '.join(tokens).encode('utf-8'))
+        self.started = True
+
+    def update(self, text):
+        text = self.carry + text
+        tokens = text.split()
+        # A token touching the end of the chunk may continue in the next one
+        self.carry = tokens.pop() if tokens and not text[-1].isspace() else ''
+        self._emit(tokens)
+
+    def hexdigest(self):
+        if self.carry:
+            self._emit([self.carry])
+            self.carry = ''
+        return self.digest.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, max_entries=500, max_age=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning(f"Ignoring unreadable response cache {path}: {e}")
+
+    @staticmethod
+    def _key(applicable_period, dept_code):
+        return f"{applicable_period}|{dept_code}"
+
+    def get(self, applicable_period, dept_code, fingerprint):
+        """Return the cached rows if the fingerprint matches, else None. Counts the hit or miss."""
+        with self.lock:
+            entry = self.entries.get(self._key(applicable_period, dept_code))
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                entry['used'] = time.time()
+                self.hits += 1
+                return [dict(row) for row in entry['rows']]
+            self.misses += 1
+            return None
+
+    def put(self, applicable_period, dept_code, fingerprint, rows):
+        now = time.time()
+        with self.lock:
+            self.entries[self._key(applicable_period, dept_code)] = {
+                'fingerprint': fingerprint,
+                'rows': rows,
+                'stored': now,
+                'used': now,
+            }
+
+    def evict(self):
+        """Drop entries older than max_age, then the least recently used beyond max_entries."""
+        cutoff = time.time() - self.max_age
+        with self.lock:
+            self.entries = {key: entry for key, entry in self.entries.items() if entry['stored'] >= cutoff}
+            if len(self.entries) > self.max_entries:
+                keep = sorted(self.entries, key=lambda key: self.entries[key]['used'], reverse=True)
+                self.entries = {key: self.entries[key] for key in keep[:self.max_entries]}
+
+    def save(self):
+        self.evict()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self.lock, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        return f"{self.hits} hits, {self.misses} misses ({rate} hit rate), {len(self.entries)} entries"
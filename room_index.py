@@ -0,0 +1,343 @@
+"""
+Room and instructor occupancy built from the scraped time and room fields.
+
+Every room and instructor gets a timeslots week mask (one bit per 30 minute
+slot, Monday first). The masks are built per department and OR-ed together.
+Each department entry stores a digest of its rows, so a rebuild re-parses
+only the departments whose digest differs. build_room_index writes
+data/room-index.json:
+
+    rooms        room -> week mask (hex)
+    instructors  name -> week mask (hex)
+    departments  deptCode -> its digest and its own rooms and instructors masks
+
+Multi-segment times ("M 1100-1330; TH 1100-1330") are paired with the
+matching segment of a ";" separated room, or all use the single room. TBA
+rooms, TBA times and unparseable segments occupy nothing.
+
+    python room_index.py free "TH 1400-1530"
+    python room_index.py room "CTC 206"
+    python room_index.py instructor "MAQUILING, JOEL T."
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import course_deltas
+import timeslots
+from course_text import clean_text
+
+log = logging.getLogger('aisis_scraper')
+
+ROOM_INDEX_PATH = os.path.join('data', 'room-index.json')
+VERSION = 2
+
+# Teaching week used for utilisation: Monday to Saturday, 07:00 to 21:00
+WEEK_DAYS = range(6)
+DAY_START = 7 * 60
+DAY_END = 21 * 60
+
+
+def _is_tba(value):
+    return not value or value in ('-', 'TBA') or value.startswith('TBA(')
+
+
+def section_occupancy(row):
+    """[(room or None, week mask)] per time segment of a row."""
+    segments = [segment.strip() for segment in row.get('time', '').split(';')]
+    rooms = [clean_text(room) for room in row.get('room', '').split(';')]
+    occupancy = []
+    for i, segment in enumerate(segments):
+        mask = timeslots.week_mask(timeslots.parse_time_range(segment))
+        if not mask:
+            continue
+        room = rooms[i] if i < len(rooms) else rooms[-1]
+        occupancy.append((None if _is_tba(room) else room, mask))
+    return occupancy
+
+
+# Parts that continue the previous name rather than start one, as in 'CUENCA, JR., MANUEL D.'
+_NAME_SUFFIXES = {'JR', 'JR.', 'SR', 'SR.', 'SJ', 'S.J.', 'II', 'III', 'IV'}
+
+
+def split_instructor_names(value):
+    """
+    'SURNAME, Given, SURNAME2, Given2' -> ['SURNAME, Given', 'SURNAME2, Given2'].
+
+    The names are index keys, so suffix parts such as 'JR.' or 'S.J.' stay
+    with their name: 'BALTAZAR, FR. VICTOR, S.J.' is one instructor.
+    """
+    names = []
+    current, size = [], 0
+    for part in (part.strip() for part in value.split(',')):
+        if not part:
+            continue
+        suffix = part.split()[0].upper() in _NAME_SUFFIXES
+        if size >= 2 and not suffix:
+            names.append(', '.join(current))
+            current, size = [], 0
+        current.append(part)
+        size += 0 if suffix else 1
+    if current:
+        names.append(', '.join(current))
+    return names
+
+
+def section_instructors(row):
+    names = [clean_text(name) for name in split_instructor_names(row.get('instructor', ''))]
+    return [name for name in names if not _is_tba(name.split(',')[0].strip())]
+
+
+def department_occupancy(rows):
+    """{'rooms': {room: mask}, 'instructors': {name: mask}} for the rows of one department."""
+    rooms = {}
+    instructors = {}
+    for row in rows:
+        week = 0
+        for room, mask in section_occupancy(row):
+            week |= mask
+            if room is not None:
+                rooms[room] = rooms.get(room, 0) | mask
+        if week:
+            for name in section_instructors(row):
+                instructors[name] = instructors.get(name, 0) | week
+    return {'rooms': rooms, 'instructors': instructors}
+
+
+def _to_hex(masks):
+    return {key: timeslots.mask_to_hex(mask) for key, mask in sorted(masks.items())}
+
+
+def _from_hex(masks):
+    return {key: timeslots.mask_from_hex(value) for key, value in masks.items()}
+
+
+def build_room_index(rows, applicable_period=None, previous=None):
+    """
+    Build the index document.
+
+    With a previous document, departments whose stored digest matches their
+    current rows keep their masks; the rest are re-parsed. rows are read once,
+    a department at a time, so they can be streamed from courses.json.
+    """
+    reuse = (previous is not None
+             and previous.get('version') == VERSION
+             and previous.get('slotMinutes') == timeslots.SLOT_MINUTES
+             and previous.get('period') == applicable_period)
+
+    departments = {}
+    rebuilt = []
+    for dept_code, dept_rows in course_deltas.department_runs(rows):
+        digest = course_deltas.department_digest(dept_rows)
+        stored = previous['departments'].get(dept_code) if reuse else None
+        if stored is not None and stored.get('digest') == digest:
+            departments[dept_code] = stored
+            continue
+        occupancy = department_occupancy(dept_rows)
+        departments[dept_code] = {'digest': digest, 'rooms': _to_hex(occupancy['rooms']),
+                                  'instructors': _to_hex(occupancy['instructors'])}
+        rebuilt.append(dept_code)
+
+    rooms = {}
+    instructors = {}
+    for entry in departments.values():
+        for room, mask in _from_hex(entry['rooms']).items():
+            rooms[room] = rooms.get(room, 0) | mask
+        for name, mask in _from_hex(entry['instructors']).items():
+            instructors[name] = instructors.get(name, 0) | mask
+    return {
+        'version': VERSION,
+        'period': applicable_period,
+        'slotMinutes': timeslots.SLOT_MINUTES,
+        'rebuilt': rebuilt,
+        'rooms': _to_hex(rooms),
+        'instructors': _to_hex(instructors),
+        'departments': departments,
+    }
+
+
+def load_room_index(path=ROOM_INDEX_PATH):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring unreadable room index {path}: {e}")
+        return None
+
+
+def write_room_index(rows, applicable_period=None, path=ROOM_INDEX_PATH):
+    """Rebuild the index after a scrape, reusing unchanged departments. Returns the document."""
+    index = build_room_index(rows, applicable_period, load_room_index(path))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({key: value for key, value in index.items() if key != 'rebuilt'}, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return index
+
+
+def window_mask(window):
+    """Week mask of a window: a time string such as "TH 1400-1530" or "M-TH 0800-0930; SAT 0800-1100"."""
+    mask = timeslots.week_mask(timeslots.parse_time_range(window))
+    if not mask:
+        raise ValueError(f"Cannot parse time window '{window}'")
+    return mask
+
+
+def _day_minutes(mask):
+    """Occupied minutes per day index of a week mask."""
+    day_bits = (1 << timeslots.SLOTS_PER_DAY) - 1
+    return [bin((mask >> (day * timeslots.SLOTS_PER_DAY)) & day_bits).count('1') * timeslots.SLOT_MINUTES
+            for day in range(len(timeslots.SHORT_DAYS))]
+
+
+class RoomIndex:
+    def __init__(self, index):
+        if index.get('version') != VERSION or index.get('slotMinutes') != timeslots.SLOT_MINUTES:
+            raise ValueError("Room index was built with another version or slot size; rebuild it")
+        self.period = index.get('period')
+        self.rooms = _from_hex(index['rooms'])
+        self.instructors = _from_hex(index['instructors'])
+        self._instructor_keys = {name.lower(): name for name in self.instructors}
+
+    @classmethod
+    def load(cls, path=ROOM_INDEX_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(build_room_index(rows))
+
+    def free_rooms(self, window, rooms=None):
+        """Known rooms with no section in the window, sorted. `rooms` limits the candidates."""
+        mask = window_mask(window) if isinstance(window, str) else window
+        candidates = self.rooms if rooms is None else rooms
+        return sorted(room for room in candidates if not self.rooms.get(room, 0) & mask)
+
+    def utilisation(self, room, days=WEEK_DAYS, start=DAY_START, end=DAY_END):
+        """Share of a room's teaching-week slots that are booked, with per-day minutes."""
+        available = timeslots.week_mask([{'days': list(days), 'start': start, 'end': end}])
+        booked = self.rooms.get(room, 0) & available
+        used = bin(booked).count('1')
+        total = bin(available).count('1')
+        return {
+            'room': room,
+            'bookedMinutes': used * timeslots.SLOT_MINUTES,
+            'availableMinutes': total * timeslots.SLOT_MINUTES,
+            'ratio': used / total if total else 0.0,
+            'days': dict(zip(timeslots.SHORT_DAYS, _day_minutes(booked))),
+        }
+
+    def instructor_load(self, name):
+        """Weekly teaching minutes of an instructor (name as in courses.json, any case), or None."""
+        key = self._instructor_keys.get(clean_text(name).lower())
+        if key is None:
+            return None
+        minutes = _day_minutes(self.instructors[key])
+        return {'instructor': key, 'minutes': sum(minutes), 'days': dict(zip(timeslots.SHORT_DAYS, minutes))}
+
+
+def scan_free_rooms(rows, window):
+    """The full scan the index replaces: parse every row's time and room for one query."""
+    mask = window_mask(window)
+    rooms = set()
+    busy = set()
+    for row in rows:
+        for room, section_mask in section_occupancy(row):
+            if room is None:
+                continue
+            rooms.add(room)
+            if section_mask & mask:
+                busy.add(room)
+    return sorted(rooms - busy)
+
+
+def benchmark(rows, windows=('TH 1400-1530', 'M-TH 0800-0930', 'SAT 0900-1200', 'W 1100-1400'), repeat=20):
+    start = time.perf_counter()
+    document = build_room_index(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+    stale = dict(document, departments=dict(document['departments']))
+    if rows:
+        stale['departments'][rows[0]['deptCode']] = {}
+    start = time.perf_counter()
+    build_room_index(rows, previous=stale)
+    incremental_ms = (time.perf_counter() - start) * 1000
+    index = RoomIndex(document)
+    results = []
+    for window in windows:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            found = index.free_rooms(window)
+        index_ms = (time.perf_counter() - start) * 1000 / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            scanned = scan_free_rooms(rows, window)
+        scan_ms = (time.perf_counter() - start) * 1000 / repeat
+        if found != scanned:
+            raise AssertionError(f"free rooms differ from the scan for {window}")
+        results.append({'window': window, 'free': len(found), 'indexMs': index_ms, 'scanMs': scan_ms})
+    return {'rooms': len(index.rooms), 'instructors': len(index.instructors), 'buildMs': build_ms,
+            'oneDeptRebuildMs': incremental_ms, 'indexBytes': len(json.dumps(document, separators=(',', ':'))),
+            'windows': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query room occupancy and instructor load.")
+    parser.add_argument('--index', default=ROOM_INDEX_PATH)
+    parser.add_argument('--courses', default=os.path.join('data', 'courses.json'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    free = commands.add_parser('free', help="rooms with nothing scheduled in a window")
+    free.add_argument('window', help='e.g. "TH 1400-1530"')
+    room = commands.add_parser('room', help="weekly utilisation of a room")
+    room.add_argument('room')
+    instructor = commands.add_parser('instructor', help="weekly load of an instructor")
+    instructor.add_argument('name')
+    commands.add_parser('build', help="rebuild the index from --courses")
+    commands.add_parser('bench', help="compare free-room queries with a full scan")
+    args = parser.parse_args()
+
+    if args.command in ('build', 'bench'):
+        with open(args.courses, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        if args.command == 'build':
+            index = write_room_index(rows, path=args.index)
+            print(f"Wrote {args.index}: {len(index['rooms'])} rooms, {len(index['instructors'])} instructors")
+            return 0
+        report = benchmark(rows)
+        print(f"{report['rooms']} rooms, {report['instructors']} instructors, index {report['indexBytes'] / 1e3:.0f} kB, "
+              f"build {report['buildMs']:.1f} ms, one-department rebuild {report['oneDeptRebuildMs']:.1f} ms")
+        for result in report['windows']:
+            print(f"  {result['window']:<16} {result['free']:4} free  index {result['indexMs']:.3f} ms  "
+                  f"scan {result['scanMs']:.3f} ms")
+        return 0
+
+    index = RoomIndex.load(args.index)
+    if args.command == 'free':
+        for name in index.free_rooms(args.window):
+            print(name)
+    elif args.command == 'room':
+        if args.room not in index.rooms:
+            print(f"{args.room} has no scheduled sections")
+            return 1
+        usage = index.utilisation(args.room)
+        print(f"{args.room}: {usage['bookedMinutes'] / 60:.1f} of {usage['availableMinutes'] / 60:.0f} hours "
+              f"({usage['ratio']:.0%})")
+        print('  ' + '  '.join(f"{day} {minutes / 60:.1f}h" for day, minutes in usage['days'].items()))
+    else:
+        load = index.instructor_load(args.name)
+        if load is None:
+            print(f"{args.name} is not in the index")
+            return 1
+        print(f"{load['instructor']}: {load['minutes'] / 60:.1f} hours a week")
+        print('  ' + '  '.join(f"{day} {minutes / 60:.1f}h" for day, minutes in load['days'].items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
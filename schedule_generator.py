@@ -0,0 +1,371 @@
+"""
+Conflict-free schedule generator over data/courses.json.
+
+Given a set of catNos and optional constraints (no classes before/after a
+time, free days, preferred instructors) it enumerates every combination of
+one section per catNo with no time conflict. Sections are reduced to their
+week bitmask (see timeslots.py), sections sharing a mask are searched once,
+courses with the fewest viable masks are placed first and a branch is cut as
+soon as some remaining course has no compatible section left.
+
+iter_schedules streams every schedule, count_schedules counts them without
+expanding them and best_schedules ranks them (fewest class days, then least
+idle time, then most preferred-instructor sections).
+
+    python schedule_generator.py "CSCI 21" "MATH 31.1" --earliest 0800 --free-days SAT --prefer SANTOS
+    python schedule_generator.py --bench
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+import itertools
+
+import timeslots
+
+COURSES_PATH = os.path.join('data', 'courses.json')
+DAY_MASK = (1 << timeslots.SLOTS_PER_DAY) - 1
+
+
+def load_courses(path=COURSES_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _allowed(course, earliest, latest, free_days):
+    for segment in timeslots.course_segments(course):
+        if earliest is not None and segment['start'] < earliest:
+            return False
+        if latest is not None and segment['end'] > latest:
+            return False
+        if free_days and free_days.intersection(segment['days']):
+            return False
+    return True
+
+
+def _plan(courses, cat_nos, earliest=None, latest=None, free_days=()):
+    """
+    Group the viable sections of every requested catNo by week mask.
+
+    Returns [(catNo, [(mask, [sections])])] ordered most-constrained first.
+    Raises ValueError for a catNo that is not offered at all.
+    """
+    free_days = set(free_days)
+    by_cat_no = {cat_no: {} for cat_no in cat_nos}
+    offered = set()
+    for course in courses:
+        groups = by_cat_no.get(course['catNo'])
+        if groups is None:
+            continue
+        offered.add(course['catNo'])
+        if _allowed(course, earliest, latest, free_days):
+            groups.setdefault(timeslots.course_mask(course), []).append(course)
+    missing = [cat_no for cat_no in cat_nos if cat_no not in offered]
+    if missing:
+        raise ValueError(f"Not offered: {', '.join(missing)}")
+    plan = [(cat_no, list(groups.items())) for cat_no, groups in by_cat_no.items()]
+    plan.sort(key=lambda entry: len(entry[1]))
+    return plan
+
+
+def _mask_combinations(plan):
+    """Yield (used_mask, [(mask, sections)] in plan order) for every conflict-free choice of masks."""
+    n = len(plan)
+    chosen = [None] * n
+
+    def search(depth, used):
+        if depth == n:
+            yield used, list(chosen)
+            return
+        for mask, sections in plan[depth][1]:
+            if mask & used:
+                continue
+            combined = used | mask
+            # Forward check: every later course must still have a compatible mask
+            if any(all(other & combined for other, _ in plan[later][1]) for later in range(depth + 1, n)):
+                continue
+            chosen[depth] = (mask, sections)
+            yield from search(depth + 1, combined)
+
+    if all(groups for _, groups in plan):
+        yield from search(0, 0)
+
+
+def _in_request_order(plan, cat_nos, picks):
+    by_cat_no = {cat_no: section for (cat_no, _), section in zip(plan, picks)}
+    return [by_cat_no[cat_no] for cat_no in cat_nos]
+
+
+def iter_schedules(courses, cat_nos, earliest=None, latest=None, free_days=()):
+    """
+    Yield every conflict-free schedule as a list of sections in `cat_nos` order.
+
+    earliest/latest are minutes since midnight, free_days are day indices
+    (0 = Monday) that must stay empty. Sections without a parseable time
+    (TBA, TUTORIAL) never conflict.
+    """
+    cat_nos = list(dict.fromkeys(cat_nos))
+    plan = _plan(courses, cat_nos, earliest, latest, free_days)
+    for _, combination in _mask_combinations(plan):
+        for picks in itertools.product(*(sections for _, sections in combination)):
+            yield _in_request_order(plan, cat_nos, picks)
+
+
+def count_schedules(courses, cat_nos, earliest=None, latest=None, free_days=()):
+    """Number of schedules iter_schedules would yield, counted without expanding them."""
+    plan = _plan(courses, list(dict.fromkeys(cat_nos)), earliest, latest, free_days)
+    n = len(plan)
+    memo = {}
+
+    def count(depth, used):
+        if depth == n:
+            return 1
+        key = (depth, used)
+        if key not in memo:
+            memo[key] = sum(
+                len(sections) * count(depth + 1, used | mask)
+                for mask, sections in plan[depth][1] if not mask & used
+            )
+        return memo[key]
+
+    return count(0, 0)
+
+
+def _day_shape(bits):
+    """(1 if the day has class else 0, idle slots between its first and last class)."""
+    if not bits:
+        return 0, 0
+    return 1, bits.bit_length() - (bits & -bits).bit_length() + 1 - bits.bit_count()
+
+
+def _shape_delta(used, mask, days):
+    """Change in (class days, idle slots) when `mask` is added to `used`; only the days of `mask` can change."""
+    added_days = 0
+    added_gaps = 0
+    for day in days:
+        offset = day * timeslots.SLOTS_PER_DAY
+        before = (used >> offset) & DAY_MASK
+        old_days, old_gaps = _day_shape(before)
+        new_days, new_gaps = _day_shape(before | ((mask >> offset) & DAY_MASK))
+        added_days += new_days - old_days
+        added_gaps += new_gaps - old_gaps
+    return added_days, added_gaps
+
+
+def _is_preferred(section, preferred):
+    instructor = section.get('instructor', '').upper()
+    return any(name in instructor for name in preferred)
+
+
+def _top_completions(options, limit):
+    """
+    Exact top-`limit` search over [[(mask, days, section, preferred_hit)]] per course.
+
+    The best completions of every (course, occupied slots) state are
+    memoized, and a state stops reading a child's sorted completions once
+    they can no longer enter its top `limit`.
+    """
+    n = len(options)
+    memo = {}
+
+    def top(depth, used):
+        key = (depth, used)
+        if key in memo:
+            return memo[key]
+        # Min-heap on negated scores, so kept[0] is the worst completion kept
+        kept = []
+        tiebreak = 0
+        for mask, days, section, preferred_hit in options[depth]:
+            if mask & used:
+                continue
+            added_days, added_gaps = _shape_delta(used, mask, days)
+            tails = top(depth + 1, used | mask) if depth + 1 < n else [((0, 0, 0), ())]
+            for score, picks in tails:
+                negated = (-score[0] - added_days, -score[1] - added_gaps, preferred_hit - score[2])
+                if len(kept) == limit and negated <= kept[0][0]:
+                    break
+                tiebreak -= 1
+                item = (negated, tiebreak, (section,) + picks)
+                if len(kept) < limit:
+                    heapq.heappush(kept, item)
+                else:
+                    heapq.heapreplace(kept, item)
+        result = [((-a, -b, -c), picks) for (a, b, c), _, picks in sorted(kept, reverse=True)]
+        memo[key] = result
+        return result
+
+    return top(0, 0)
+
+
+def best_schedules(courses, cat_nos, limit=10, earliest=None, latest=None, free_days=(),
+                   preferred_instructors=()):
+    """
+    The `limit` best schedules as (score, schedule) pairs, best first.
+
+    Schedules are ranked by fewest class days, then least idle time between
+    classes, then most preferred-instructor sections. Within one mask
+    combination the preferred section is picked for every course, so only
+    distinct week shapes compete for the top places.
+
+    Because class days rank first, day sets are tried smallest first: for a
+    day set S only sections that fit inside S are searched, which keeps
+    every search small, and once `limit` schedules are known after all day
+    sets of one size, no schedule using more days can displace them.
+    """
+    cat_nos = list(dict.fromkeys(cat_nos))
+    preferred = [name.upper() for name in preferred_instructors]
+    plan = _plan(courses, cat_nos, earliest, latest, free_days)
+    options = []
+    for _, groups in plan:
+        choices = []
+        for mask, sections in groups:
+            best = next((section for section in sections if _is_preferred(section, preferred)), None)
+            days = [day for day in range(7) if (mask >> (day * timeslots.SLOTS_PER_DAY)) & DAY_MASK]
+            choices.append((mask, days, best or sections[0], 1 if best is not None else 0))
+        options.append(choices)
+    if limit <= 0 or not all(options):
+        return []
+
+    found = {}
+    for size in range(8):
+        for day_set in itertools.combinations(range(7), size):
+            allowed = set(day_set)
+            restricted = [[choice for choice in choices if allowed.issuperset(choice[1])] for choices in options]
+            if not all(restricted):
+                continue
+            restricted.sort(key=len)
+            for score, picks in _top_completions(restricted, limit):
+                found[tuple(sorted(section['id'] for section in picks))] = (score, picks)
+        if len(found) >= limit:
+            break
+
+    ranked = sorted(found.values(), key=lambda entry: entry[0])[:limit]
+    order = {cat_no: index for index, cat_no in enumerate(cat_nos)}
+    return [
+        ({'days': score[0], 'idleMinutes': score[1] * timeslots.SLOT_MINUTES, 'preferred': -score[2]},
+         sorted(picks, key=lambda section: order[section['catNo']]))
+        for score, picks in ranked
+    ]
+
+
+def _hhmm(value):
+    value = value.zfill(4)
+    return int(value[:-2]) * 60 + int(value[-2:])
+
+
+def _synthetic_courses(course_count, sections, seed=0):
+    rng = random.Random(seed)
+    time_pool = [
+        "M-TH 0800-0930", "M-TH 0930-1100", "M-TH 1100-1230", "M-TH 1230-1400", "M-TH 1400-1530",
+        "M-TH 1530-1700", "T-F 0800-0930", "T-F 0930-1100", "T-F 1100-1230", "T-F 1230-1400",
+        "T-F 1400-1530", "T-F 1530-1700", "W 0800-1100", "W 1100-1400", "W 1400-1700",
+        "SAT 0800-1100", "SAT 1100-1400",
+    ]
+    courses = []
+    for c in range(course_count):
+        for s in range(sections):
+            time_string = rng.choice(time_pool)
+            course = {
+                'id': f"{c}-{s}",
+                'catNo': f"BENCH {c}",
+                'section': str(s),
+                'instructor': rng.choice(["SANTOS, Maria", "REYES, Jose", "CRUZ, Ana", "TAN, Paolo"]),
+                'time': time_string,
+            }
+            course.update(timeslots.time_fields(time_string))
+            courses.append(course)
+    return courses
+
+
+def _bench_cases(seed=0):
+    """(label, courses, catNos): the most-offered and random real catNos, plus a synthetic worst case."""
+    cases = []
+    if os.path.exists(COURSES_PATH):
+        courses = load_courses()
+        sections = {}
+        for course in courses:
+            sections[course['catNo']] = sections.get(course['catNo'], 0) + 1
+        most_offered = sorted(sections, key=lambda cat_no: -sections[cat_no])
+        for count in (6, 8, 10):
+            cases.append((f"top {count} catNos", courses, most_offered[:count]))
+        rng = random.Random(seed)
+        busy = sorted(cat_no for cat_no, total in sections.items() if total >= 12)
+        for count in (8, 10):
+            cases.append((f"random {count} catNos", courses, rng.sample(busy, count)))
+    for count, per_course in ((8, 24), (10, 36)):
+        cases.append((f"synthetic {count}x{per_course}", _synthetic_courses(count, per_course, seed),
+                      [f"BENCH {c}" for c in range(count)]))
+    return cases
+
+
+def benchmark(limit=10, stream=1000, seed=0):
+    """Time streaming the first `stream` schedules and ranking the best `limit`."""
+    results = []
+    for label, courses, cat_nos in _bench_cases(seed):
+        sections = sum(1 for course in courses if course['catNo'] in set(cat_nos))
+        start = time.perf_counter()
+        streamed = sum(1 for _ in itertools.islice(iter_schedules(courses, cat_nos), stream))
+        stream_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        best = best_schedules(courses, cat_nos, limit=limit, preferred_instructors=["SANTOS"])
+        rank_seconds = time.perf_counter() - start
+        results.append({
+            'case': label,
+            'sections': sections,
+            'streamed': streamed,
+            'streamSeconds': round(stream_seconds, 4),
+            'rankSeconds': round(rank_seconds, 4),
+            'best': best[0][0] if best else None,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List conflict-free schedules for a set of catNos.")
+    parser.add_argument('cat_nos', nargs='*')
+    parser.add_argument('--courses', default=COURSES_PATH)
+    parser.add_argument('--earliest', help="no class before this time (HHMM)")
+    parser.add_argument('--latest', help="no class after this time (HHMM)")
+    parser.add_argument('--free-days', default='', help="comma-separated days to keep free, e.g. SAT,W")
+    parser.add_argument('--prefer', action='append', default=[], help="preferred instructor name (repeatable)")
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--bench', action='store_true', help="run the scaling benchmark")
+    args = parser.parse_args()
+
+    if args.bench:
+        print(f"{'case':<22} {'sections':>8} {'first 1000 s':>13} {'best 10 s':>10}  best")
+        for result in benchmark():
+            best = result['best']
+            shape = f"{best['days']} days, {best['idleMinutes']} idle min" if best else "no schedule"
+            print(f"{result['case']:<22} {result['sections']:>8} {result['streamSeconds']:>13.4f} "
+                  f"{result['rankSeconds']:>10.4f}  {shape}")
+        return 0
+    if not args.cat_nos:
+        parser.error("give at least one catNo, or --bench")
+
+    courses = load_courses(args.courses)
+    free_days = [timeslots.SHORT_DAYS.index(day) for day in args.free_days.upper().split(',') if day]
+    constraints = {
+        'earliest': _hhmm(args.earliest) if args.earliest else None,
+        'latest': _hhmm(args.latest) if args.latest else None,
+        'free_days': free_days,
+    }
+    try:
+        best = best_schedules(courses, args.cat_nos, args.limit, preferred_instructors=args.prefer, **constraints)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if not best:
+        print("No conflict-free schedule")
+    for rank, (score, schedule) in enumerate(best, 1):
+        print(f"\n#{rank}  {score['days']} days, {score['idleMinutes']} idle min, {score['preferred']} preferred")
+        for section in schedule:
+            print(f"  {section['catNo']:<14} {section['section']:<6} {section['time']:<32} {section.get('instructor', '')}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
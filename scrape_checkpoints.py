@@ -0,0 +1,91 @@
+"""
+Per-department checkpoints for resuming a partially failed scrape.
+
+Every department the scraper fetches is written to
+.cache/checkpoints/<period>/<slug>.json as soon as it arrives. A run that
+publishes a snapshot, complete or partial, clears the period's checkpoints.
+A run that publishes nothing leaves them behind, and with SCRAPER_RESUME=1
+the next run reuses every checkpoint younger than
+SCRAPER_RESUME_MAX_AGE_HOURS and fetches only the missing departments.
+Departments served from a checkpoint are listed in stale-departments.json
+with the time they were fetched.
+"""
+import os
+import re
+import json
+import logging
+import time
+import shutil
+
+log = logging.getLogger('aisis_scraper')
+
+CHECKPOINT_DIR = os.path.join('.cache', 'checkpoints')
+STALE_PATH = os.path.join('data', 'stale-departments.json')
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9]+', '-', value).strip('-') or 'x'
+
+
+class CheckpointStore:
+    def __init__(self, applicable_period, root=CHECKPOINT_DIR):
+        self.applicable_period = applicable_period
+        self.dir = os.path.join(root, _slug(applicable_period))
+
+    def _path(self, dept_code):
+        return os.path.join(self.dir, f"{_slug(dept_code)}.json")
+
+    def save(self, dept_code, rows):
+        os.makedirs(self.dir, exist_ok=True)
+        path = self._path(dept_code)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'deptCode': dept_code, 'fetched': time.time(), 'rows': rows}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def load(self, dept_code, max_age=None):
+        """Rows checkpointed for a department, or None if there are none (or they are older than max_age seconds)."""
+        checkpoint = self.load_entry(dept_code, max_age)
+        return checkpoint['rows'] if checkpoint is not None else None
+
+    def load_entry(self, dept_code, max_age=None):
+        """Like load(), but returns the whole {deptCode, fetched, rows} checkpoint."""
+        path = self._path(dept_code)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+        if checkpoint.get('deptCode') != dept_code:
+            return None
+        if max_age is not None and time.time() - checkpoint['fetched'] > max_age:
+            return None
+        return checkpoint
+
+    def clear(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def write_stale(applicable_period, departments, path=STALE_PATH):
+    """
+    Record which departments in the published snapshot are stale.
+
+    `departments` is a list of {deptCode, reason, rows} dicts, plus
+    `fetched` (epoch milliseconds) when the rows come from a checkpoint, and
+    empty after a complete, fresh run. The file is rewritten only when its content changes.
+    Returns True if it was written.
+    """
+    content = json.dumps({'period': applicable_period, 'departments': departments}, indent=2) + '\n'
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
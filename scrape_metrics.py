@@ -0,0 +1,280 @@
+"""
+Run metrics for aisis_scraper.py.
+
+RunMetrics collects phase timings (login, warmup, fetch, write) and, per
+period and department, request latency, response bytes, parse time, row
+count, transport retries, re-logins and cache hits. At the end of a run the
+scraper writes a JSON report (SCRAPER_REPORT, default
+.cache/scrape-report.json), with departments grouped by period, and prints
+summary().
+
+Diagnostics go through the "aisis_scraper" logger; setup_logging() prints
+them as "LEVEL: message" from SCRAPER_LOG_LEVEL up (default INFO, DEBUG for
+every request detail).
+
+SCRAPER_PROFILE=cprofile or tracemalloc profiles the whole run, from the
+client's creation to the report: cProfile in the main thread and in every
+fetch worker started with initializer=metrics.profile_thread, tracemalloc
+for the peak allocation of the process.
+
+    python scrape_metrics.py old-report.json new-report.json [--threshold 0.2]
+"""
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import logging
+import argparse
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+REPORT_PATH = os.path.join('.cache', 'scrape-report.json')
+REPORT_VERSION = 2
+LOGGER_NAME = 'aisis_scraper'
+
+# Per-department numbers that are added up when recorded more than once
+_ADDITIVE = ('requests', 'requestSeconds', 'bytes', 'parseSeconds', 'retries', 'relogins')
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout, so log lines stay in order with print() and follow redirect_stdout."""
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+def setup_logging(level=None):
+    """Print the scraper's log records from SCRAPER_LOG_LEVEL (or level) up. Safe to call more than once."""
+    logger = logging.getLogger(LOGGER_NAME)
+    name = (level or os.environ.get('SCRAPER_LOG_LEVEL') or 'INFO').upper()
+    logger.setLevel(getattr(logging, name, logging.INFO))
+    if not any(isinstance(handler, _StdoutHandler) for handler in logger.handlers):
+        handler = _StdoutHandler()
+        handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
+
+
+class RunProfiler:
+    """Opt-in cProfile or tracemalloc instrumentation of a whole run."""
+
+    MODES = ('cprofile', 'tracemalloc')
+
+    def __init__(self, mode):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {', '.join(self.MODES)}")
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.profiles = []
+        self.result = None
+        if mode == 'tracemalloc':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.base = tracemalloc.get_traced_memory()[0]
+        else:
+            self.profile_thread()
+
+    def profile_thread(self):
+        """Start profiling the calling thread (cProfile only)."""
+        if self.mode != 'cprofile':
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from the first enable()
+            return
+        with self.lock:
+            self.profiles.append(profile)
+
+    def report(self, limit=15):
+        """Stop profiling and summarize the run. Later calls return the same result."""
+        if self.result is not None:
+            return self.result
+        if self.mode == 'cprofile':
+            stats = None
+            out = io.StringIO()
+            with self.lock:
+                for profile in self.profiles:
+                    profile.disable()
+                    if stats is None:
+                        stats = pstats.Stats(profile, stream=out)
+                    else:
+                        stats.add(profile)
+            if stats is not None:
+                stats.sort_stats('cumulative').print_stats(limit)
+            self.result = {'mode': self.mode, 'threads': len(self.profiles), 'top': out.getvalue()}
+        else:
+            self.result = {'mode': self.mode, 'peakBytes': tracemalloc.get_traced_memory()[1] - self.base}
+        return self.result
+
+
+class RunMetrics:
+    def __init__(self, profile=None):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.departments = {}
+        self.status = 'failed'
+        self.profiler = RunProfiler(profile) if profile else None
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block and add it to the named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def record(self, applicable_period, dept_code, **fields):
+        """Merge measurements for a department of a period; counters and durations accumulate."""
+        with self.lock:
+            entry = self.departments.setdefault((applicable_period, dept_code), {})
+            for key, value in fields.items():
+                if key in _ADDITIVE:
+                    entry[key] = entry.get(key, 0) + value
+                else:
+                    entry[key] = value
+
+    def profile_thread(self):
+        """ThreadPoolExecutor initializer that adds the worker thread to the run profile."""
+        if self.profiler:
+            self.profiler.profile_thread()
+
+    def by_period(self):
+        """{period: {deptCode: entry}}, the report form of the per-department records."""
+        periods = {}
+        for (applicable_period, dept_code), entry in self.departments.items():
+            periods.setdefault(applicable_period, {})[dept_code] = entry
+        return periods
+
+    def totals(self):
+        departments = self.departments.values()
+        return {
+            'departments': len(self.departments),
+            'requests': sum(entry.get('requests', 0) for entry in departments),
+            'bytes': sum(entry.get('bytes', 0) for entry in departments),
+            'rows': sum(entry.get('rows', 0) for entry in departments),
+            'requestSeconds': sum(entry.get('requestSeconds', 0) for entry in departments),
+            'parseSeconds': sum(entry.get('parseSeconds', 0) for entry in departments),
+            'retries': sum(entry.get('retries', 0) for entry in departments),
+            'relogins': sum(entry.get('relogins', 0) for entry in departments),
+            'cacheHits': sum(1 for entry in departments if entry.get('cacheHit')),
+        }
+
+    def report(self, **extra):
+        report = {
+            'version': REPORT_VERSION,
+            'started': self.started,
+            'status': self.status,
+            'wallSeconds': time.perf_counter() - self.start,
+            'phases': dict(self.phases),
+            'totals': self.totals(),
+            'departments': self.by_period(),
+        }
+        report.update(extra)
+        if self.profiler:
+            report['profile'] = self.profiler.report()
+        return report
+
+    def summary(self, slowest=5):
+        totals = self.totals()
+        phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        lines = [
+            f"Run {self.status} in {time.perf_counter() - self.start:.2f}s ({phases})",
+            f"{totals['departments']} departments, {totals['rows']} rows, {totals['requests']} requests, "
+            f"{totals['bytes'] / 1e6:.2f} MB, {totals['retries']} retries, {totals['relogins']} re-logins, "
+            f"{totals['cacheHits']} cache hits",
+            f"Request time {totals['requestSeconds']:.2f}s, parse time {totals['parseSeconds']:.2f}s (summed over workers)",
+        ]
+        ranked = sorted(self.departments.items(), key=lambda item: item[1].get('requestSeconds', 0), reverse=True)
+        for (applicable_period, dept_code), entry in ranked[:slowest]:
+            lines.append(f"  {applicable_period} {dept_code:<14} {entry.get('requestSeconds', 0):6.2f}s request "
+                         f"{entry.get('parseSeconds', 0):6.3f}s parse {entry.get('rows', 0):6} rows")
+        if self.profiler and self.profiler.mode == 'cprofile':
+            lines.append(self.profiler.report()['top'])
+        elif self.profiler:
+            lines.append(f"Peak allocation {self.profiler.report()['peakBytes'] / 1e6:.2f} MB")
+        return '\n'.join(lines)
+
+
+def write_report(report, path=REPORT_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_reports(old, new, threshold=0.2, min_seconds=0.05):
+    """Regressions of new against old: phases, totals and departments that got slower or bigger by more than threshold.
+
+    Durations below min_seconds in both runs are ignored as noise. Returns a list of messages.
+    """
+    regressions = []
+
+    def check(label, before, after, seconds=True):
+        if before is None or after is None:
+            return
+        if seconds and max(before, after) < min_seconds:
+            return
+        if after > before * (1 + threshold):
+            change = f"+{(after - before) / before:.0%}" if before else "new"
+            unit = 's' if seconds else ''
+            regressions.append(f"{label}: {before:.3f}{unit} -> {after:.3f}{unit} ({change})")
+
+    for name in new.get('phases', {}):
+        check(f"phase {name}", old.get('phases', {}).get(name), new['phases'][name])
+    for key in ('requestSeconds', 'parseSeconds'):
+        check(f"total {key}", old['totals'].get(key), new['totals'].get(key))
+    for key in ('bytes', 'retries', 'relogins'):
+        check(f"total {key}", old['totals'].get(key), new['totals'].get(key), seconds=False)
+    if new['totals'].get('rows', 0) < old['totals'].get('rows', 0):
+        regressions.append(f"total rows: {old['totals']['rows']} -> {new['totals']['rows']}")
+    # Version 1 reports keyed departments without their period, so they are not compared per department
+    same_layout = old.get('version') == new.get('version') == REPORT_VERSION
+    for applicable_period, departments in (new.get('departments', {}) if same_layout else {}).items():
+        for dept_code, entry in departments.items():
+            before = old['departments'].get(applicable_period, {}).get(dept_code)
+            if before is None:
+                continue
+            label = f"{applicable_period} {dept_code}"
+            check(f"{label} requestSeconds", before.get('requestSeconds'), entry.get('requestSeconds'))
+            check(f"{label} parseSeconds", before.get('parseSeconds'), entry.get('parseSeconds'))
+    if new.get('status') == 'failed' and old.get('status') != 'failed':
+        regressions.append(f"status: {old.get('status')} -> failed")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two scraper run reports and flag regressions.")
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.2, help="relative slowdown to flag (default 0.2)")
+    args = parser.parse_args()
+    regressions = compare_reports(load_report(args.old), load_report(args.new), args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if not regressions:
+        print("No regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,409 @@
+"""
+Daemon mode for aisis_scraper.py: one warm session, per-department refreshes
+and a small local HTTP endpoint.
+
+    python aisis_scraper.py --daemon
+    python scraper_daemon.py
+
+The client logs in once. fetch_department re-establishes the session when
+AISIS reports it expired, so the daemon re-authenticates only then. Every
+department is refreshed every SCRAPER_DAEMON_INTERVAL seconds (default 900),
+overridden per department with SCRAPER_DAEMON_INTERVALS="DISCS=120,MA=300".
+A department that fails keeps its last rows, is listed in
+data/stale-departments.json and is retried sooner, backing off up to its
+interval.
+
+Changed departments are published into data/courses.json, with the same
+changelog, history and derived artifacts as a one-shot run, at most once every
+SCRAPER_DAEMON_PUBLISH_SECONDS (default 30). If courses.json already holds the
+period it is served from the start; otherwise the first publish waits until
+every department has been tried once.
+
+SCRAPER_DAEMON_HOST:SCRAPER_DAEMON_PORT (default 127.0.0.1:8765) serves
+
+    /snapshot[?dept=CODE]  the published courses.json, with an ETag
+    /health                session and schedule state; 503 unless status is ok
+    /metrics               the run report so far and the per-department schedule
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import signal
+import hashlib
+import logging
+import itertools
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scrape_checkpoints
+import scrape_metrics
+from aisis_scraper import (
+    DEPT_CODES, AISISClient, RateLimiter, SnapshotWriter, fetch_department, finish_run, load_summary,
+    previous_rows_by_dept, publish_artifacts, save_cache, setup_cache,
+)
+
+DEFAULT_INTERVAL = 900
+DEFAULT_PUBLISH_SECONDS = 30
+# First retry of a failed department; doubled per consecutive failure, capped at its interval
+RETRY_SECONDS = 30
+
+log = logging.getLogger(f"{scrape_metrics.LOGGER_NAME}.daemon")
+
+
+def parse_intervals(spec):
+    """'DISCS=120,MA=300' -> {'DISCS': 120.0, 'MA': 300.0}."""
+    intervals = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        dept_code, _, seconds = item.rpartition('=')
+        if not dept_code or dept_code.strip() not in DEPT_CODES:
+            raise ValueError(f"Unknown department in interval '{item}'")
+        intervals[dept_code.strip()] = float(seconds)
+    return intervals
+
+
+class ScraperDaemon:
+    def __init__(self, client, applicable_period, limiter, workers=4, default_interval=DEFAULT_INTERVAL,
+                 intervals=None, publish_seconds=DEFAULT_PUBLISH_SECONDS, output_path=os.path.join('data', 'courses.json')):
+        self.client = client
+        self.applicable_period = applicable_period
+        self.limiter = limiter
+        self.workers = workers
+        self.publish_seconds = publish_seconds
+        self.output_path = output_path
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.started = time.time()
+        self.schedule = {
+            dept_code: {'interval': (intervals or {}).get(dept_code, default_interval), 'lastAttempt': None,
+                        'lastSuccess': None, 'lastChange': None, 'failures': 0, 'nextDue': self.started}
+            for dept_code in DEPT_CODES
+        }
+        self.in_flight = set()
+        self.dirty = False
+        # Bumped with every change, so a publish clears dirty only if nothing changed while it ran
+        self.generation = 0
+        # Set while courses.json is replaced but its changelog and artifacts are not yet written, with the
+        # summary of the snapshot it replaced, so the next publish finishes them even if the rows are unchanged
+        self.artifacts_pending = False
+        self.pending_previous = None
+        self.last_publish = None
+        self.published = None
+
+        # A snapshot of this period is served right away and refreshed in place
+        self.rows = previous_rows_by_dept(output_path, applicable_period)
+        self.ready = bool(self.rows)
+        if self.ready:
+            self._load_published(self.rows)
+
+    def _load_published(self, rows_by_dept):
+        with open(self.output_path, 'rb') as f:
+            data = f.read()
+        published = {'etag': f'"{hashlib.sha256(data).hexdigest()[:20]}"', 'data': data,
+                     'rows': rows_by_dept, 'at': time.time()}
+        with self.lock:
+            self.published = published
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _record(self, dept_code, courses):
+        """Store a refresh result. Returns the seconds until the department is due again."""
+        now = time.time()
+        with self.lock:
+            self.in_flight.discard(dept_code)
+            entry = self.schedule[dept_code]
+            entry['lastAttempt'] = now
+            if courses is None:
+                entry['failures'] += 1
+                delay = min(entry['interval'], RETRY_SECONDS * 2 ** (entry['failures'] - 1))
+            else:
+                entry['failures'] = 0
+                entry['lastSuccess'] = now
+                if self.rows.get(dept_code) != courses:
+                    self.rows[dept_code] = courses
+                    entry['lastChange'] = now
+                    self.dirty = True
+                    self.generation += 1
+                delay = entry['interval']
+            entry['nextDue'] = now + delay
+            if not self.ready and all(item['lastAttempt'] is not None for item in self.schedule.values()):
+                self.ready = True
+                self.dirty = True
+                self.generation += 1
+        return delay
+
+    def _stale(self):
+        return [{'deptCode': dept_code, 'reason': 'fetch failed', 'rows': len(self.rows.get(dept_code, []))}
+                for dept_code, entry in self.schedule.items() if entry['failures']]
+
+    def _published(self, generation):
+        """Clear dirty after a publish of `generation`, unless a newer change came in meanwhile."""
+        with self.lock:
+            if self.generation == generation:
+                self.dirty = False
+
+    def publish(self):
+        """
+        Write the current rows to courses.json and the derived files if anything changed. Returns True if it did.
+
+        The rows stay dirty until the write succeeds, so an exception leaves them to the next publish.
+        """
+        with self.lock:
+            rows_by_dept = {dept_code: self.rows.get(dept_code, []) for dept_code in DEPT_CODES}
+            stale = self._stale()
+            generation = self.generation
+        metrics = self.client.metrics
+        with metrics.phase('write'):
+            writer = SnapshotWriter(self.output_path)
+            try:
+                for dept_code in DEPT_CODES:
+                    writer.write_rows(rows_by_dept[dept_code])
+                if writer.count == 0:
+                    writer.abort()
+                    log.warning("No courses collected yet, not publishing")
+                    self._published(generation)
+                    return False
+                scrape_checkpoints.write_stale(self.applicable_period, stale)
+                changed = writer.finish()
+                if not changed and not self.artifacts_pending:
+                    self._published(generation)
+                    return False
+            except BaseException:
+                writer.abort()
+                raise
+            if changed:
+                if not self.artifacts_pending:
+                    self.pending_previous = load_summary(self.output_path)
+                writer.publish()
+                self.artifacts_pending = True
+            all_courses = [row for dept_code in DEPT_CODES for row in rows_by_dept[dept_code]]
+            version = publish_artifacts(self.applicable_period, self.output_path, self.pending_previous, all_courses)
+            self.artifacts_pending = False
+            self.pending_previous = None
+        self._published(generation)
+        self._load_published(rows_by_dept)
+        save_cache(self.client)
+        log.info(f"Published {len(all_courses)} courses to {self.output_path} (changelog version {version}, "
+                 f"{len(stale)} stale departments)")
+        return True
+
+    def _try_publish(self):
+        """publish(), logging a failure instead of stopping the daemon; the changes are retried on the next cycle."""
+        try:
+            return self.publish()
+        except Exception:
+            log.exception(f"Publishing {self.output_path} failed, its changes stay pending")
+            return False
+
+    def _publish_due(self):
+        with self.lock:
+            if not (self.dirty and self.ready):
+                return False
+        return self.last_publish is None or time.monotonic() - self.last_publish >= self.publish_seconds
+
+    def run(self):
+        """Refresh departments as they fall due until stop() is called."""
+        sequence = itertools.count()
+        due = [(time.monotonic(), next(sequence), dept_code) for dept_code in DEPT_CODES]
+        heapq.heapify(due)
+        pending = {}
+        pool = ThreadPoolExecutor(max_workers=self.workers, initializer=self.client.metrics.profile_thread)
+        try:
+            while not self.stop_event.is_set():
+                while due and due[0][0] <= time.monotonic() and len(pending) < self.workers:
+                    _, _, dept_code = heapq.heappop(due)
+                    with self.lock:
+                        self.in_flight.add(dept_code)
+                    pending[pool.submit(fetch_department, self.client, self.applicable_period, dept_code,
+                                        self.limiter)] = dept_code
+                if pending:
+                    done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        dept_code = pending.pop(future)
+                        delay = self._record(dept_code, future.result())
+                        heapq.heappush(due, (time.monotonic() + delay, next(sequence), dept_code))
+                if self._publish_due():
+                    self.last_publish = time.monotonic()
+                    self._try_publish()
+                if not pending:
+                    self.stop_event.wait(min(1.0, max(0.0, due[0][0] - time.monotonic())))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            with self.lock:
+                unpublished = self.dirty and self.ready
+            if unpublished:
+                self._try_publish()
+            save_cache(self.client)
+
+    def health(self):
+        now = time.time()
+        with self.lock:
+            failing = [dept_code for dept_code, entry in self.schedule.items() if entry['failures']]
+            # A department is overdue when it has gone two intervals without a successful refresh
+            overdue = [dept_code for dept_code, entry in self.schedule.items()
+                       if now - (entry['lastSuccess'] or self.started) > 2 * entry['interval']]
+            published = self.published
+            in_flight = sorted(self.in_flight)
+            ready = self.ready
+        if not ready:
+            status = 'starting'
+        elif failing or overdue:
+            status = 'degraded'
+        else:
+            status = 'ok'
+        return {
+            'status': status,
+            'period': self.applicable_period,
+            'uptimeSeconds': now - self.started,
+            'sessionGeneration': self.client.session_generation,
+            'lastPublish': published['at'] if published else None,
+            'publishedRows': sum(len(rows) for rows in published['rows'].values()) if published else 0,
+            'failing': failing,
+            'overdue': overdue,
+            'inFlight': in_flight,
+        }
+
+    def metrics_json(self):
+        with self.lock:
+            schedule = {dept_code: dict(entry) for dept_code, entry in self.schedule.items()}
+        metrics = self.client.metrics
+        # RunMetrics is still being updated by the fetch workers; serialize under its lock
+        with metrics.lock:
+            return json.dumps(metrics.report(parser=self.client.parser, daemon={
+                'period': self.applicable_period, 'schedule': schedule,
+            }), indent=2)
+
+    def snapshot(self, dept_code=None):
+        """(etag, JSON bytes) of the published snapshot or one department of it; None if there is none."""
+        with self.lock:
+            published = self.published
+        if published is None:
+            return None
+        if dept_code is None:
+            return published['etag'], published['data']
+        rows = published['rows'].get(dept_code, [])
+        return f'"{published["etag"][1:-1]}-{dept_code}"', json.dumps(rows, indent=4).encode('utf-8')
+
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, scraper):
+        super().__init__(address, _Handler)
+        self.scraper = scraper
+
+    def start(self):
+        """Serve on a background thread and return self."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, data, headers=None):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        scraper = self.server.scraper
+        url = urlsplit(self.path)
+        if url.path == '/snapshot':
+            dept_code = parse_qs(url.query).get('dept', [None])[0]
+            if dept_code is not None and dept_code not in DEPT_CODES:
+                self._send(404, json.dumps({'error': f"Unknown department {dept_code}"}))
+                return
+            snapshot = scraper.snapshot(dept_code)
+            if snapshot is None:
+                self._send(503, json.dumps({'error': "No snapshot published yet"}))
+                return
+            etag, data = snapshot
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, b'', {'ETag': etag})
+                return
+            self._send(200, data, {'ETag': etag, 'Cache-Control': 'no-cache'})
+        elif url.path == '/health':
+            health = scraper.health()
+            self._send(200 if health['status'] == 'ok' else 503, json.dumps(health, indent=2))
+        elif url.path == '/metrics':
+            self._send(200, scraper.metrics_json())
+        else:
+            self._send(404, json.dumps({'error': "Not found"}))
+
+
+def serve(client):
+    username = os.environ.get('AISIS_USERNAME')
+    password = os.environ.get('AISIS_PASSWORD')
+    applicable_period = os.environ.get('APPLICABLE_PERIOD', '2024-2')
+    if not username or not password:
+        log.error("AISIS credentials not found in environment variables")
+        return 1
+
+    metrics = client.metrics
+    with metrics.phase('login'):
+        logged_in = client.login(username, password)
+    if not logged_in:
+        log.error("Login failed, not starting the daemon")
+        return 1
+    with metrics.phase('warmup'):
+        warmed_up = client.warmup()
+    if not warmed_up:
+        log.error("Warmup failed, not starting the daemon")
+        return 1
+    setup_cache(client)
+
+    scraper = ScraperDaemon(
+        client, applicable_period,
+        RateLimiter(float(os.environ.get('SCRAPER_RATE', '1'))),
+        workers=max(1, int(os.environ.get('SCRAPER_WORKERS', '4'))),
+        default_interval=float(os.environ.get('SCRAPER_DAEMON_INTERVAL', DEFAULT_INTERVAL)),
+        intervals=parse_intervals(os.environ.get('SCRAPER_DAEMON_INTERVALS')),
+        publish_seconds=float(os.environ.get('SCRAPER_DAEMON_PUBLISH_SECONDS', DEFAULT_PUBLISH_SECONDS)),
+    )
+    server = DaemonServer((os.environ.get('SCRAPER_DAEMON_HOST', '127.0.0.1'),
+                           int(os.environ.get('SCRAPER_DAEMON_PORT', '8765'))), scraper).start()
+    host, port = server.server_address[:2]
+    log.info(f"Scraper daemon for period {applicable_period} serving http://{host}:{port}/snapshot")
+    metrics.status = 'running'
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: scraper.stop())
+    try:
+        scraper.run()
+    except KeyboardInterrupt:
+        scraper.stop()
+    finally:
+        server.shutdown()
+        server.server_close()
+    metrics.status = 'stopped'
+    return 0
+
+
+def main():
+    scrape_metrics.setup_logging()
+    client = AISISClient()
+    try:
+        return serve(client)
+    finally:
+        finish_run(client)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
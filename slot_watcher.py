@@ -0,0 +1,178 @@
+"""
+Watch the free slots of selected sections during enlistment.
+
+Only the departments that offer a watched (catNo, section) are polled, and
+each page is reduced to the watched rows' slot columns: cell 7 (maximum
+slots) and cell 10 (free slots). Full course rows are never built. A JSON
+line is printed, and optionally appended to --output, only when a watched
+value changes.
+
+    python slot_watcher.py "CSCI 21 A" "MATH 31.1 K1" --interval 30
+    python slot_watcher.py --watchlist watch.txt --once
+
+Watch entries are "<catNo> <section>"; the section is the last word. The
+department is looked up in data/courses.json unless given as
+"<deptCode>:<catNo> <section>". Credentials and AISIS_BASE_URL come from the
+same environment variables as aisis_scraper.py.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import contextlib
+
+import aisis_scraper
+import scrape_metrics
+from aisis_scraper import AISISClient, RateLimiter, SessionExpiredError
+from course_text import clean_text
+
+log = logging.getLogger(scrape_metrics.LOGGER_NAME)
+
+MAX_SLOTS_CELL = 7
+FREE_SLOTS_CELL = 10
+
+
+def parse_watch_entry(entry):
+    """'DISCS:CSCI 21 A' or 'CSCI 21 A' -> (deptCode or None, catNo, section)."""
+    dept_code = None
+    head, _, rest = entry.partition(':')
+    if rest and ' ' not in head:
+        dept_code, entry = head, rest
+    cat_no, _, section = entry.strip().rpartition(' ')
+    if not cat_no or not section:
+        raise ValueError(f"Watch entry '{entry}' is not '<catNo> <section>'")
+    return dept_code, clean_text(cat_no), section
+
+
+def load_watchlist(entries, path=None):
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = list(entries) + [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return [parse_watch_entry(entry) for entry in entries]
+
+
+def resolve_departments(watchlist, snapshot_path=os.path.join('data', 'courses.json')):
+    """Group the watchlist by department: {deptCode: {(catNo, section), ...}}."""
+    missing = [(cat_no, section) for dept_code, cat_no, section in watchlist if dept_code is None]
+    located = {}
+    if missing:
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            for row in json.load(f):
+                located.setdefault((row['catNo'], row['section']), row['deptCode'])
+    departments = {}
+    for dept_code, cat_no, section in watchlist:
+        dept_code = dept_code or located.get((cat_no, section))
+        if dept_code is None:
+            raise ValueError(f"{cat_no} {section} is not in {snapshot_path}; give it as '<deptCode>:{cat_no} {section}'")
+        departments.setdefault(dept_code, set()).add((cat_no, section))
+    return departments
+
+
+def watched_slots(course_cells, watched):
+    """Slot columns of the watched rows only: {(catNo, section): {'maxSlots', 'freeSlots'}}."""
+    slots = {}
+    for i in range(0, len(course_cells) - 13, 14):
+        key = (clean_text(course_cells[i]), clean_text(course_cells[i + 1]))
+        if key in watched and key not in slots:
+            slots[key] = {
+                'maxSlots': clean_text(course_cells[i + MAX_SLOTS_CELL]),
+                'freeSlots': clean_text(course_cells[i + FREE_SLOTS_CELL]),
+            }
+    return slots
+
+
+class SlotWatcher:
+    def __init__(self, client, applicable_period, departments, limiter):
+        self.client = client
+        self.applicable_period = applicable_period
+        self.departments = departments
+        self.limiter = limiter
+        self.last = {}
+
+    def poll_department(self, dept_code):
+        """Fetch one department and return its watched slots, or None if it could not be fetched."""
+        for attempt in range(2):
+            self.limiter.acquire()
+            generation = self.client.session_generation
+            try:
+                cells, _ = self.client.fetch_cells(self.applicable_period, dept_code)
+                return watched_slots(cells, self.departments[dept_code])
+            except SessionExpiredError:
+                if attempt == 0 and self.client.relogin(generation):
+                    continue
+            except Exception:
+                log.exception(f"Slot poll failed for {dept_code}")
+            return None
+        return None
+
+    def poll(self):
+        """Poll every watched department once. Returns the change events."""
+        events = []
+        now = int(time.time() * 1000)
+        for dept_code, watched in self.departments.items():
+            slots = self.poll_department(dept_code)
+            if slots is None:
+                continue
+            for cat_no, section in sorted(watched):
+                value = slots.get((cat_no, section), {'maxSlots': None, 'freeSlots': None})
+                key = (cat_no, section)
+                if self.last.get(key) != value:
+                    events.append({'timestamp': now, 'deptCode': dept_code, 'catNo': cat_no, 'section': section,
+                                   'previous': self.last.get(key), **value})
+                    self.last[key] = value
+        return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print free-slot changes of selected sections.")
+    parser.add_argument('entries', nargs='*', help='"<catNo> <section>" or "<deptCode>:<catNo> <section>"')
+    parser.add_argument('--watchlist', help="file with one entry per line")
+    parser.add_argument('--interval', type=float, default=float(os.environ.get('SLOT_WATCH_INTERVAL', '30')),
+                        help="seconds between polls of the watched departments")
+    parser.add_argument('--rate', type=float, default=float(os.environ.get('SCRAPER_RATE', '1')))
+    parser.add_argument('--output', help="also append change events to this JSON lines file")
+    parser.add_argument('--once', action='store_true', help="poll once and exit")
+    args = parser.parse_args()
+
+    watchlist = load_watchlist(args.entries, args.watchlist)
+    if not watchlist:
+        parser.error("nothing to watch")
+    departments = resolve_departments(watchlist)
+    scrape_metrics.setup_logging()
+
+    username = os.environ.get('AISIS_USERNAME')
+    password = os.environ.get('AISIS_PASSWORD')
+    applicable_period = os.environ.get('APPLICABLE_PERIOD', '2024-2')
+    if not username or not password:
+        print("Error: AISIS credentials not found in environment variables")
+        return 1
+
+    # Scraper progress goes to stderr so stdout carries only the change events
+    events_out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        client = AISISClient()
+        if not client.login(username, password) or not client.warmup():
+            return 1
+        watcher = SlotWatcher(client, applicable_period, departments, RateLimiter(args.rate))
+        print(f"Watching {len(watchlist)} sections in {len(departments)} of {len(aisis_scraper.DEPT_CODES)} departments")
+
+        while True:
+            started = time.monotonic()
+            for event in watcher.poll():
+                line = json.dumps(event)
+                print(line, file=events_out, flush=True)
+                if args.output:
+                    with open(args.output, 'a', encoding='utf-8') as f:
+                        f.write(line + '\n')
+            if args.once:
+                return 0
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
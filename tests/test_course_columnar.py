@@ -0,0 +1,71 @@
+"""
+The columnar file must decode back to exactly the rows of data/courses.json.
+
+Covers the in-memory round trip, dictionary encoding of repetitive string
+columns, the written file and its gzip copy, and the rejection of rows whose
+fields differ.
+"""
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import course_columnar  # noqa: E402
+
+
+def course(index, dept):
+    return {'id': f"id-{index}", 'deptCode': dept, 'catNo': f"CSCI {index}", 'section': 'A',
+            'courseTitle': 'INTRO TO COMPUTING', 'units': '3', 'time': f"M-TH {900 + index:04d}-1100",
+            'room': 'CTC 102' if index % 2 else 'CTC 206', 'instructor': 'ÑAÑEZ, José', 'remarks': '-'}
+
+
+ROWS = [course(index, 'DISCS' if index < 6 else 'MA') for index in range(10)]
+
+
+def test_round_trip():
+    doc = course_columnar.to_columnar(iter(ROWS))
+    assert doc['count'] == len(ROWS)
+    assert doc['fields'] == list(ROWS[0])
+    assert course_columnar.from_columnar(doc) == ROWS
+    assert course_columnar.from_columnar(json.loads(course_columnar.dumps(ROWS))) == ROWS
+
+
+def test_repetitive_columns_are_dictionary_encoded():
+    columns = course_columnar.to_columnar(ROWS)['columns']
+    assert columns['deptCode'] == {'dict': ['DISCS', 'MA'], 'codes': [0] * 6 + [1] * 4}
+    assert columns['room']['dict'] == ['CTC 206', 'CTC 102']
+    assert columns['id'] == {'values': [row['id'] for row in ROWS]}
+    assert 'values' in columns['time']
+
+
+def test_empty_snapshot():
+    doc = course_columnar.to_columnar([])
+    assert (doc['count'], doc['fields'], doc['columns']) == (0, [], {})
+    assert course_columnar.from_columnar(doc) == []
+
+
+def test_mixed_fields_are_rejected():
+    rows = ROWS[:2] + [dict(ROWS[2], extra='x')]
+    with pytest.raises(ValueError):
+        course_columnar.to_columnar(rows)
+    reordered = dict(reversed(list(ROWS[3].items())))
+    with pytest.raises(ValueError):
+        course_columnar.to_columnar(ROWS[:3] + [reordered])
+
+
+def test_unknown_format_is_rejected():
+    doc = dict(course_columnar.to_columnar(ROWS), version=course_columnar.VERSION + 1)
+    with pytest.raises(ValueError):
+        course_columnar.from_columnar(doc)
+
+
+def test_written_files_round_trip(tmp_path):
+    path = str(tmp_path / 'data' / 'courses.columnar.json')
+    sizes = course_columnar.write_columnar(ROWS, path)
+    assert {path, f"{path}.gz"} <= set(sizes)
+    assert all(size == os.path.getsize(output_path) for output_path, size in sizes.items())
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path / 'data'))
+    assert course_columnar.read_columnar(path) == ROWS
+    assert course_columnar.read_columnar(f"{path}.gz") == ROWS
@@ -0,0 +1,165 @@
+"""
+Applying the changelog must reproduce the published snapshot exactly.
+
+A client holding snapshot version N applies deltas_since(changelog, N) to its
+copy of data/courses.json. These tests check that apply_delta(s) of
+compute_delta gives back the new rows for additions, removals, edits and
+moves, and that version/baseVersion in the changelog only ever offer a client
+deltas that start from the snapshot it holds.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import course_deltas  # noqa: E402
+
+PERIOD = '2025-1'
+
+
+def course(course_id, dept='DISCS', **fields):
+    row = {'id': course_id, 'deptCode': dept, 'catNo': f"CSCI {course_id}", 'section': 'A',
+           'courseTitle': 'INTRO TO COMPUTING', 'units': '3', 'time': 'M-TH 0930-1100',
+           'room': 'CTC 102', 'instructor': 'SANTOS, Maria', 'remarks': '-'}
+    row.update(fields)
+    return row
+
+
+BASE = [course('1'), course('2'), course('3'), course('4', 'MA'), course('5', 'MA')]
+
+CASES = {
+    'unchanged': BASE,
+    'added first': [course('0')] + BASE,
+    'added in between': BASE[:2] + [course('2b'), course('2c')] + BASE[2:],
+    'added last': BASE + [course('6', 'MA')],
+    'removed': [BASE[0], BASE[2], BASE[4]],
+    'modified': [BASE[0], course('2', room='CTC 206'), BASE[2], BASE[3], course('5', 'MA', instructor='TBA')],
+    'moved': [BASE[2], BASE[0], BASE[1], BASE[3], BASE[4]],
+    'mixed': [course('2', time='T-F 1400-1530'), course('7'), BASE[0], BASE[4], course('8', 'MA')],
+    'emptied': [],
+}
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_apply_delta_reproduces_new_snapshot(name):
+    new = CASES[name]
+    delta = course_deltas.compute_delta(BASE, new)
+    assert course_deltas.apply_delta(BASE, delta) == new
+    assert course_deltas.is_empty(delta) == (new == BASE)
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_summary_gives_the_same_delta_as_rows(name):
+    new = CASES[name]
+    from_summary = course_deltas.compute_delta(course_deltas.summarize(BASE), iter(new))
+    assert from_summary == course_deltas.compute_delta(BASE, new)
+
+
+def test_order_only_when_additions_do_not_explain_it():
+    assert 'order' not in course_deltas.compute_delta(BASE, CASES['added in between'])
+    assert 'order' not in course_deltas.compute_delta(BASE, CASES['removed'])
+    assert course_deltas.compute_delta(BASE, CASES['moved'])['order'] == [row['id'] for row in CASES['moved']]
+
+
+def test_delta_from_empty_snapshot_adds_everything():
+    delta = course_deltas.compute_delta([], BASE)
+    assert [entry['course'] for entry in delta['added']] == BASE
+    assert course_deltas.apply_delta([], delta) == BASE
+
+
+def test_apply_delta_does_not_modify_input():
+    snapshot = list(BASE)
+    course_deltas.apply_delta(snapshot, course_deltas.compute_delta(BASE, CASES['mixed']))
+    assert snapshot == BASE
+
+
+def test_apply_deltas_chain():
+    snapshots = [BASE, CASES['added in between'], CASES['mixed'], CASES['moved'], CASES['emptied'], BASE]
+    deltas = [course_deltas.compute_delta(old, new) for old, new in zip(snapshots, snapshots[1:])]
+    for start in range(len(snapshots)):
+        assert course_deltas.apply_deltas(snapshots[start], deltas[start:]) == BASE
+
+
+def record(snapshots, path, **kwargs):
+    """record_snapshot every consecutive pair, returning {version: snapshot}."""
+    versions = {course_deltas.record_snapshot([], snapshots[0], PERIOD, path=path, **kwargs): snapshots[0]}
+    for old, new in zip(snapshots, snapshots[1:]):
+        versions[course_deltas.record_snapshot(course_deltas.summarize(old), new, PERIOD, path=path,
+                                               **kwargs)] = new
+    return versions
+
+
+def test_clients_at_every_version_reach_the_latest_snapshot(tmp_path):
+    path = str(tmp_path / 'changelog.json')
+    snapshots = [BASE, CASES['added in between'], CASES['mixed'], CASES['moved'], CASES['modified']]
+    versions = record(snapshots, path)
+    changelog = course_deltas.load_changelog(path)
+
+    assert sorted(versions) == list(range(1, len(snapshots) + 1))
+    assert changelog['version'] == max(versions)
+    assert changelog['baseVersion'] == 1
+    for version, snapshot in versions.items():
+        deltas = course_deltas.deltas_since(changelog, version)
+        assert [entry['version'] for entry in deltas] == list(range(version + 1, changelog['version'] + 1))
+        assert course_deltas.apply_deltas(snapshot, deltas) == snapshots[-1]
+
+
+def test_unchanged_snapshot_keeps_the_version(tmp_path):
+    path = str(tmp_path / 'changelog.json')
+    version = course_deltas.record_snapshot([], BASE, PERIOD, path=path)
+    assert course_deltas.record_snapshot(BASE, list(BASE), PERIOD, path=path) == version
+    assert course_deltas.load_changelog(path)['entries'] == []
+
+
+def test_trimmed_history_moves_base_version(tmp_path):
+    path = str(tmp_path / 'changelog.json')
+    snapshots = [BASE, CASES['added first'], CASES['added last'], CASES['removed'], CASES['moved']]
+    versions = record(snapshots, path, max_entries=2)
+    changelog = course_deltas.load_changelog(path)
+
+    assert [entry['version'] for entry in changelog['entries']] == [4, 5]
+    assert changelog['baseVersion'] == 3
+    assert course_deltas.deltas_since(changelog, 2) is None
+    for version in (3, 4, 5):
+        deltas = course_deltas.deltas_since(changelog, version)
+        assert course_deltas.apply_deltas(versions[version], deltas) == snapshots[-1]
+
+
+def test_versions_outside_the_history_need_a_full_reload(tmp_path):
+    path = str(tmp_path / 'changelog.json')
+    record([BASE, CASES['modified']], path)
+    changelog = course_deltas.load_changelog(path)
+    assert course_deltas.deltas_since(changelog, 0) is None
+    assert course_deltas.deltas_since(changelog, changelog['version'] + 1) is None
+    assert course_deltas.deltas_since(changelog, changelog['version']) == []
+
+
+def test_period_change_starts_past_every_version_clients_hold(tmp_path):
+    path = str(tmp_path / 'changelog.json')
+    old_version = max(record([BASE, CASES['modified'], CASES['moved']], path))
+
+    version = course_deltas.record_snapshot(CASES['moved'], [course('9')], '2025-2', path=path)
+    changelog = course_deltas.load_changelog(path)
+    assert version == old_version + 1
+    assert changelog['baseVersion'] == version
+    assert changelog['entries'] == []
+    assert course_deltas.deltas_since(changelog, old_version) is None
+
+    version = course_deltas.record_snapshot([course('9')], BASE, '2026-1', path=path, last_version=version + 10)
+    assert version == old_version + 12
+
+
+def test_unreadable_changelog_starts_fresh(tmp_path):
+    path = tmp_path / 'changelog.json'
+    path.write_text('{"version": 3, "baseVer', encoding='utf-8')
+    assert course_deltas.load_changelog(str(path)) is None
+    version = course_deltas.record_snapshot(BASE, CASES['moved'], PERIOD, path=str(path), last_version=3)
+    assert version == 4
+    assert course_deltas.load_changelog(str(path))['baseVersion'] == 4
+
+
+def test_department_runs_rejects_split_departments():
+    assert [dept for dept, _ in course_deltas.department_runs(BASE)] == ['DISCS', 'MA']
+    with pytest.raises(ValueError):
+        list(course_deltas.department_runs([BASE[0], BASE[3], BASE[1]]))
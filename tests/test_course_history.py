@@ -0,0 +1,111 @@
+"""
+course_history must store only what changed and answer the CLI queries from it.
+
+Each test records a few runs of small snapshots into an in-memory database
+and checks the run counts, the stored versions of a section, the field
+changes derived from them and the added/removed-since queries.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import course_history  # noqa: E402
+
+PERIOD = '2025-1'
+
+
+def course(course_id, dept='DISCS', section='A', **fields):
+    row = {'id': course_id, 'deptCode': dept, 'catNo': f"CSCI {course_id}", 'section': section,
+           'courseTitle': 'INTRO TO COMPUTING', 'units': '3', 'time': 'M-TH 0930-1100',
+           'room': 'CTC 102', 'instructor': 'SANTOS, Maria', 'remarks': '-'}
+    row.update(fields)
+    return row
+
+
+RUN_1 = [course('21'), course('22'), course('10', 'MA')]
+RUN_2 = [course('21', room='CTC 206'), course('10', 'MA'), course('11', 'MA')]
+RUN_3 = [course('21', room='CTC 206', instructor='REYES, Jose'), course('10', 'MA'), course('11', 'MA'),
+         course('23')]
+
+
+@pytest.fixture
+def history():
+    history = course_history.CourseHistory(':memory:')
+    history.record_run(PERIOD, iter(RUN_1), run_at=100)
+    history.record_run(PERIOD, iter(RUN_2), run_at=200)
+    history.record_run(PERIOD, iter(RUN_3), run_at=300)
+    yield history
+    history.close()
+
+
+def test_first_run_adds_every_section():
+    history = course_history.CourseHistory(':memory:')
+    summary = history.record_run(PERIOD, RUN_1, run_at=100)
+    assert (summary['added'], summary['modified'], summary['removed']) == (3, 0, 0)
+    assert history.has_period(PERIOD)
+    assert not history.has_period('2025-2')
+
+
+def test_runs_count_changes(history):
+    runs = history.runs(PERIOD)
+    assert [run['runAt'] for run in runs] == [300, 200, 100]
+    assert [(run['rows'], run['added'], run['modified'], run['removed']) for run in runs] == [
+        (4, 1, 1, 0), (3, 1, 1, 1), (3, 3, 0, 0)]
+
+
+def test_identical_run_stores_nothing(history):
+    summary = history.record_run(PERIOD, RUN_3, run_at=400)
+    assert (summary['added'], summary['modified'], summary['removed']) == (0, 0, 0)
+    assert len(history.versions('CSCI 21', 'A')) == 3
+
+
+def test_record_unchanged_logs_the_run_only(history):
+    history.record_unchanged(PERIOD, len(RUN_3), run_at=400)
+    latest = history.runs(PERIOD, limit=1)[0]
+    assert (latest['runAt'], latest['rows'], latest['added'], latest['modified'], latest['removed']) == (
+        400, 4, 0, 0, 0)
+    assert len(history.versions('CSCI 21', 'A')) == 3
+
+
+def test_versions_of_a_section(history):
+    versions = history.versions('CSCI 21', 'A', PERIOD)
+    assert [(run_at, change) for run_at, change, _ in versions] == [
+        (100, 'added'), (200, 'modified'), (300, 'modified')]
+    assert [row for _, _, row in versions] == [RUN_1[0], RUN_2[0], RUN_3[0]]
+    assert history.versions('CSCI 22', 'A') == [(100, 'added', RUN_1[1]), (200, 'removed', RUN_1[1])]
+
+
+def test_field_changes(history):
+    assert history.field_changes('CSCI 21', 'A') == [
+        {'runAt': 200, 'id': '21', 'field': 'room', 'old': 'CTC 102', 'new': 'CTC 206'},
+        {'runAt': 300, 'id': '21', 'field': 'instructor', 'old': 'SANTOS, Maria', 'new': 'REYES, Jose'},
+    ]
+    assert history.field_changes('CSCI 21', 'A', fields=('room',)) == [
+        {'runAt': 200, 'id': '21', 'field': 'room', 'old': 'CTC 102', 'new': 'CTC 206'},
+    ]
+    assert history.field_changes('CSCI 10', 'A') == []
+
+
+def test_sections_added_since(history):
+    assert [row['id'] for row in history.sections_added_since(0)] == ['21', '22', '10', '11', '23']
+    added = history.sections_added_since(200)
+    assert [(row['id'], row['changedAt']) for row in added] == [('11', 200), ('23', 300)]
+    assert [row['id'] for row in history.sections_added_since(200, dept_code='DISCS')] == ['23']
+    assert history.sections_added_since(200, applicable_period='2025-2') == []
+
+
+def test_sections_removed_since(history):
+    removed = history.sections_removed_since(0)
+    assert removed == [dict(RUN_1[1], changedAt=200)]
+    assert history.sections_removed_since(0, dept_code='MA') == []
+    assert history.sections_removed_since(201) == []
+
+
+def test_periods_are_kept_apart(history):
+    summary = history.record_run('2025-2', [course('21')], run_at=400)
+    assert (summary['added'], summary['modified'], summary['removed']) == (1, 0, 0)
+    assert [row['id'] for row in history.sections_added_since(400)] == ['21']
+    assert len(history.versions('CSCI 21', 'A', PERIOD)) == 3
+    assert history.record_run(PERIOD, RUN_3, run_at=500)['added'] == 0
@@ -0,0 +1,132 @@
+"""
+Incremental rebuilds of the room index and the program join must equal full ones.
+
+Both documents keep a digest per department and reuse the stored part of
+every department whose rows did not change. For each edit below (a section
+moved to another room, a department added or dropped, ...) the rebuild from
+the previous document must match a build from scratch apart from the list of
+departments it re-parsed, and that list must be exactly the changed ones.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import room_index  # noqa: E402
+import program_offerings  # noqa: E402
+
+PERIOD = '2025-1'
+
+
+def course(course_id, dept, cat_no, time, room, instructor='SANTOS, Maria'):
+    return {'id': course_id, 'deptCode': dept, 'catNo': cat_no, 'section': 'A', 'courseTitle': cat_no,
+            'units': '3', 'time': time, 'room': room, 'instructor': instructor, 'remarks': '-'}
+
+
+ROWS = [
+    course('1', 'DISCS', 'CSCI 21', 'M-TH 0930-1100', 'CTC 102', 'REYES, Jose, SANTOS, Maria'),
+    course('2', 'DISCS', 'CSCI 22', 'T-F 1400-1530', 'CTC 206'),
+    course('3', 'DISCS', 'ISCS 30.66', 'M 1100-1330; TH 1100-1330', 'CTC 102; SEC A117', 'CUENCA, JR., Manuel D.'),
+    course('4', 'CHEM', 'CHEM 10', 'W 0800-1100', 'SEC B201', 'DELA CRUZ, Ana'),
+    course('5', 'PHYS', 'PHYS 10', 'SAT 0900-1200', 'TBA', 'LIM, Ben'),
+    course('6', 'PE', 'PHYED 1', 'T-F 0800-0930', 'COV COURTS', 'TBA'),
+    course('7', 'PE', 'PATHFIT 1', 'M-TH 1530-1700', 'COV COURTS', 'GO, Carla'),
+    course('8', '**IE**', 'ENE 13', 'W 1700-2000', 'INNOVATION 202', 'VAN DER WALL, Hidde'),
+]
+
+
+def replace(rows, course_id, **fields):
+    return [dict(row, **fields) if row['id'] == course_id else row for row in rows]
+
+
+# name: (new rows, departments that must be re-parsed)
+EDITS = {
+    'unchanged': (ROWS, []),
+    'room changed': (replace(ROWS, '2', room='F 113'), ['DISCS']),
+    'instructor changed': (replace(ROWS, '5', instructor='TAN, Eve'), ['PHYS']),
+    'section added': (ROWS[:5] + [course('9', 'PHYS', 'PHYS 10', 'M 0800-0930', 'SEC C1')] + ROWS[5:], ['PHYS']),
+    'department added': (ROWS + [course('10', 'ENVI', 'ENVI 10', 'TH 1400-1530', 'SOM 111')], ['ENVI']),
+    'department dropped': ([row for row in ROWS if row['deptCode'] != 'CHEM'], []),
+    'two departments changed': (replace(replace(ROWS, '4', time='W 0800-0930'), '7', catNo='PATHFIT 2'),
+                                ['CHEM', 'PE']),
+}
+
+PROGRAMS = {
+    'BS CS': [{'program_info': 'BS Computer Science', 'years': [
+        {'year': 1, 'semesters': [
+            {'name': 'First', 'courses': [{'catNo': 'CSCI 21'}, {'catNo': 'NatSc 10'}, {'catNo': 'PATHFIT 1'}]},
+            {'name': 'Second', 'courses': [{'catNo': 'CSCI 22'}, {'catNo': 'ISCS 30'}, {'catNo': 'IE 1'}]},
+        ]},
+    ]}],
+    'BS ME': [{'program_info': 'BS Management Engineering', 'years': [
+        {'year': 1, 'semesters': [
+            {'name': 'First', 'courses': [{'catNo': 'NatSc 10'}, {'catNo': 'PE 1'}, {'catNo': 'IE 2'}]},
+        ]},
+    ]}],
+}
+
+
+def without(doc, key):
+    return {k: v for k, v in doc.items() if k != key}
+
+
+@pytest.mark.parametrize('name', EDITS)
+def test_room_index_incremental_equals_full(name):
+    rows, changed = EDITS[name]
+    previous = room_index.build_room_index(ROWS, PERIOD)
+    incremental = room_index.build_room_index(iter(rows), PERIOD, previous=previous)
+    full = room_index.build_room_index(rows, PERIOD)
+    assert without(incremental, 'rebuilt') == without(full, 'rebuilt')
+    assert sorted(incremental['rebuilt']) == changed
+
+
+@pytest.mark.parametrize('name', EDITS)
+def test_program_join_incremental_equals_full(name):
+    rows, changed = EDITS[name]
+    previous = program_offerings.build_join(PROGRAMS, ROWS, PERIOD)
+    incremental = program_offerings.build_join(PROGRAMS, iter(rows), PERIOD, previous=previous)
+    full = program_offerings.build_join(PROGRAMS, rows, PERIOD)
+    assert without(incremental, 'rematched') == without(full, 'rematched')
+    assert incremental['rematched'] == changed
+
+
+def test_stale_department_digest_is_rebuilt():
+    previous = room_index.build_room_index(ROWS, PERIOD)
+    previous['departments']['DISCS'] = dict(previous['departments']['DISCS'], digest='stale', rooms={})
+    rebuilt = room_index.build_room_index(ROWS, PERIOD, previous=previous)
+    assert rebuilt['rebuilt'] == ['DISCS']
+    assert without(rebuilt, 'rebuilt') == without(room_index.build_room_index(ROWS, PERIOD), 'rebuilt')
+
+    previous = program_offerings.build_join(PROGRAMS, ROWS, PERIOD)
+    previous['departments']['DISCS'] = 'stale'
+    for depts in previous['offerings'].values():
+        depts.pop('DISCS', None)
+    rebuilt = program_offerings.build_join(PROGRAMS, ROWS, PERIOD, previous=previous)
+    assert rebuilt['rematched'] == ['DISCS']
+    assert rebuilt['offerings'] == program_offerings.build_join(PROGRAMS, ROWS, PERIOD)['offerings']
+
+
+def test_period_or_programs_change_rebuilds_everything():
+    departments = sorted({row['deptCode'] for row in ROWS})
+    previous = room_index.build_room_index(ROWS, PERIOD)
+    assert sorted(room_index.build_room_index(ROWS, '2025-2', previous=previous)['rebuilt']) == departments
+
+    previous = program_offerings.build_join(PROGRAMS, ROWS, PERIOD)
+    assert program_offerings.build_join(PROGRAMS, ROWS, '2025-2', previous=previous)['rematched'] == departments
+    programs = dict(PROGRAMS, **{'BS MA': PROGRAMS['BS ME']})
+    assert program_offerings.build_join(programs, ROWS, PERIOD, previous=previous)['rematched'] == departments
+
+
+def test_join_offerings():
+    join = program_offerings.build_join(PROGRAMS, ROWS, PERIOD)
+    assert join['offerings'] == {
+        'CSCI 21': {'DISCS': ['1']},
+        'CSCI 22': {'DISCS': ['2']},
+        'IE 1': {'**IE**': ['8']},
+        'IE 2': {'**IE**': ['8']},
+        'ISCS 30': {'DISCS': ['3']},
+        'NatSc 10': {'CHEM': ['4'], 'PHYS': ['5']},
+        'PATHFIT 1': {'PE': ['6', '7']},
+        'PE 1': {'PE': ['6', '7']},
+    }
@@ -0,0 +1,83 @@
+"""
+Every parser backend must read saved AISIS result pages the same way.
+
+tests/fixtures/aisis/ holds J_VCSC.do result pages built from rows of
+data/courses.json in the AISIS markup (CRLF line endings, mixed-case tags,
+extra classes, entities, <br> and <font> inside cells, comments, non-ASCII
+names). Drop further saved pages into the directory to cover them too.
+
+html.parser is the reference. cells_lxml and the streaming LxmlCells fed by
+fetch_page must give the same cell text and rows (lxml normalizes line
+endings, and the row builder collapses whitespace anyway, so cells are
+compared after clean_text); LxmlCells is fed the page the way fetch_page reads
+it, as bytes decoded incrementally, in chunks that split tags, entities and
+multibyte characters.
+"""
+import os
+import sys
+import codecs
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import aisis_scraper  # noqa: E402
+from course_text import clean_text  # noqa: E402
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'aisis')
+PAGES = sorted(filename for filename in os.listdir(PAGES_DIR) if filename.endswith('.html'))
+CHUNK_SIZES = (1, 7, 500, aisis_scraper.STREAM_CHUNK_SIZE)
+
+needs_lxml = pytest.mark.skipif(aisis_scraper.lxml is None, reason="lxml is not installed")
+
+
+def _read(filename):
+    with open(os.path.join(PAGES_DIR, filename), 'rb') as f:
+        return f.read()
+
+
+def _streamed_cells(data, chunk_size):
+    stream = aisis_scraper.LxmlCells()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    for start in range(0, len(data), chunk_size):
+        stream.feed(decoder.decode(data[start:start + chunk_size]))
+    stream.feed(decoder.decode(b'', final=True))
+    return stream.close()
+
+
+def _text(cells):
+    return [clean_text(cell) for cell in cells]
+
+
+def _rows(cells, dept_code):
+    return list(aisis_scraper.iter_courses(cells, dept_code, '2025-1'))
+
+
+def test_fixture_pages_exist():
+    assert PAGES, f"no saved pages in {PAGES_DIR}"
+
+
+@pytest.mark.parametrize('filename', PAGES)
+def test_reference_parser_reads_whole_rows(filename):
+    cells = aisis_scraper.cells_html_parser(_read(filename).decode('utf-8'))
+    assert len(cells) % 14 == 0
+
+
+@needs_lxml
+@pytest.mark.parametrize('filename', PAGES)
+def test_cells_lxml_matches_html_parser(filename):
+    html_content = _read(filename).decode('utf-8')
+    reference = aisis_scraper.cells_html_parser(html_content)
+    cells = aisis_scraper.cells_lxml(html_content)
+    assert _text(cells) == _text(reference)
+    assert _rows(cells, filename) == _rows(reference, filename)
+
+
+@needs_lxml
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('filename', PAGES)
+def test_streaming_lxml_matches_html_parser(filename, chunk_size):
+    data = _read(filename)
+    reference = aisis_scraper.cells_html_parser(data.decode('utf-8'))
+    cells = _streamed_cells(data, chunk_size)
+    assert _text(cells) == _text(reference)
+    assert _rows(cells, filename) == _rows(reference, filename)
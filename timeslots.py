@@ -0,0 +1,134 @@
+"""
+Structured time slots and week-occupancy bitmasks for course time strings.
+
+parse_time_range follows parseTimeRange in lib/helper.js: "M-TH" means Monday
+and Thursday, "T-F" Tuesday and Friday, "D" Monday to Friday, other day
+groups are "," or "-" separated day names, and anything unparseable
+(TBA, TUTORIAL, malformed times) yields no segment.
+
+A week mask has one bit per SLOT_MINUTES slot, day-major starting Monday
+00:00, so two sections conflict exactly when their masks share a bit.
+
+Scraped courses store both forms (time_fields): timeSlots, one
+[dayIndex, startMinute, endMinute] triple per day of every segment, and
+timeMask, the week mask in hex.
+"""
+import re
+
+SHORT_DAYS = ["M", "T", "W", "TH", "F", "SAT", "SU"]
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+_DAY_RANGES = {
+    "M-TH": [0, 3],
+    "T-F": [1, 4],
+    "D": [0, 1, 2, 3, 4],
+}
+_HHMM_RE = re.compile(r'^(\d{1,2})(\d{2})$')
+_DAY_SPLIT_RE = re.compile(r',|-')
+
+
+def _parse_hhmm(value):
+    match = _HHMM_RE.match(value)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def _parse_segment(segment):
+    parts = segment.split(' ')
+    day_range = parts[0]
+    time_range = parts[1] if len(parts) > 1 else ''
+    if not day_range or not time_range:
+        return None
+
+    bounds = time_range.split('-')
+    if len(bounds) < 2 or not bounds[0] or not bounds[1]:
+        return None
+
+    if day_range in _DAY_RANGES:
+        days = list(_DAY_RANGES[day_range])
+    else:
+        names = _DAY_SPLIT_RE.split(day_range)
+        if any(name not in SHORT_DAYS for name in names):
+            return None
+        days = [SHORT_DAYS.index(name) for name in names]
+
+    start = _parse_hhmm(bounds[0])
+    end = _parse_hhmm(bounds[1])
+    # Validity is judged on HHMM values, as parseTimeRange does
+    if start is None or end is None or start[0] * 100 + start[1] >= end[0] * 100 + end[1]:
+        return None
+    return {'days': days, 'start': start[0] * 60 + start[1], 'end': end[0] * 60 + end[1]}
+
+
+def parse_time_range(time_string):
+    """Parse "M-TH 0930-1100; SAT 0800-1100" into [{'days', 'start', 'end'}] with minutes since midnight."""
+    segments = []
+    for segment in time_string.split(';'):
+        parsed = _parse_segment(segment.strip())
+        if parsed is not None:
+            segments.append(parsed)
+    return segments
+
+
+def week_mask(segments):
+    """Bitmask of every slot the segments touch. Partial slots count as occupied."""
+    mask = 0
+    for segment in segments:
+        first = segment['start'] // SLOT_MINUTES
+        last = min(-(-segment['end'] // SLOT_MINUTES), SLOTS_PER_DAY)
+        if last <= first:
+            continue
+        run = ((1 << (last - first)) - 1) << first
+        for day in segment['days']:
+            mask |= run << (day * SLOTS_PER_DAY)
+    return mask
+
+
+def mask_to_hex(mask):
+    return format(mask, 'x')
+
+
+def mask_from_hex(value):
+    return int(value, 16) if value else 0
+
+
+def slot_triples(segments):
+    """Segments as compact [dayIndex, startMinute, endMinute] triples, one per day."""
+    return [[day, segment['start'], segment['end']] for segment in segments for day in segment['days']]
+
+
+def time_fields(time_string):
+    """The structured fields stored on every scraped course: timeSlots triples and the timeMask."""
+    segments = parse_time_range(time_string)
+    return {'timeSlots': slot_triples(segments), 'timeMask': mask_to_hex(week_mask(segments))}
+
+
+def course_segments(course):
+    """Segments of a course dict, from its stored timeSlots or by parsing its time string."""
+    if 'timeSlots' in course:
+        return [{'days': [day], 'start': start, 'end': end} for day, start, end in course['timeSlots']]
+    return parse_time_range(course.get('time', ''))
+
+
+def course_mask(course):
+    """Week mask of a course dict, from its stored timeMask or by parsing its time string."""
+    if 'timeMask' in course:
+        return mask_from_hex(course['timeMask'])
+    return week_mask(parse_time_range(course.get('time', '')))
+
+
+def masks_conflict(a, b):
+    return a & b != 0
+
+
+def has_time_conflict(course1, course2):
+    """Exact minute-level overlap check, equivalent to hasTimeConflict in lib/helper.js."""
+    segments2 = course_segments(course2)
+    for segment1 in course_segments(course1):
+        for segment2 in segments2:
+            if set(segment1['days']) & set(segment2['days']):
+                if not (segment1['end'] <= segment2['start'] or segment2['end'] <= segment1['start']):
+                    return True
+    return False
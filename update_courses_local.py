@@ -2,10 +2,11 @@ import os
 import sys
 import json
 import time
-import pickle
 import subprocess
 from pathlib import Path
 
+import course_deltas
+
 
 def load_env_file():
     """Load environment variables from .env file if it exists"""
@@ -104,30 +105,29 @@ def main():
         run_cmd([sys.executable, '-m', 'pip', 'install', '-q', 'requests', 'beautifulsoup4'])
         print("✅ Dependencies installed\n")
     
-    # Create cookies file
-    with open('cookies.pkl', 'wb') as f:
-        pickle.dump({}, f)
-    
     # Run scraper
     print("🔍 Scraping AISIS...")
-    try:
-        result = run_cmd([sys.executable, 'aisis_scraper.py'], check=False)
-        if result.returncode != 0:
-            print("❌ Scraper failed")
-            if result.stderr:
-                print(result.stderr)
-            sys.exit(1)
-        
-        # Check output
-        courses_file = Path('data/courses.json')
-        if not courses_file.exists() or courses_file.stat().st_size == 0:
-            print("❌ No course data generated\n")
-            sys.exit(1)
-        
-        print("✅ Scraping complete\n")
-    finally:
-        # Cleanup
-        Path('cookies.pkl').unlink(missing_ok=True)
+    result = run_cmd([sys.executable, 'aisis_scraper.py'], check=False)
+    if result.returncode != 0:
+        print("❌ Scraper failed")
+        if result.stderr:
+            print(result.stderr)
+        sys.exit(1)
+    
+    # Check output
+    courses_file = Path('data/courses.json')
+    if not courses_file.exists() or courses_file.stat().st_size == 0:
+        print("❌ No course data generated\n")
+        sys.exit(1)
+    
+    print("✅ Scraping complete\n")
+    
+    # The scraper leaves courses.json untouched when nothing changed, so only
+    # bump lastUpdated (and commit) when the course data itself moved.
+    result = run_cmd(['git', 'diff', '--quiet', '--', 'data/courses.json'], check=False)
+    if result.returncode == 0:
+        print("ℹ️  No changes detected\n")
+        return
     
     # Update semester info
     print("📝 Updating semester info...")
@@ -137,7 +137,8 @@ def main():
     semester_info = {
         'period': period,
         'semesterString': semester_string,
-        'lastUpdated': timestamp
+        'lastUpdated': timestamp,
+        'changelogVersion': course_deltas.current_version(),
     }
     
     with open('data/semester-info.json', 'w', encoding='utf-8') as f:
@@ -172,11 +173,13 @@ def main():
 
 - Updated course listings
 - Updated semester information
+- Appended the section delta to the changelog
 - Semester: {semester_string}
 - Timestamp: {timestamp}"""
     
     print("\n📦 Committing...")
-    run_cmd(['git', 'add', 'data/courses.json', 'data/semester-info.json'])
+    run_cmd(['git', 'add', 'data/courses.json', 'data/semester-info.json', 'data/courses-changelog.json',
+             'data/stale-departments.json'])
     run_cmd(['git', 'commit', '-m', commit_msg])
     print("✅ Committed\n")
     